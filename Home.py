@@ -1,10 +1,14 @@
 import streamlit as st
-import numpy as np 
-from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder
-import pandas as pd
-import pickle
-import requests
-from streamlit_lottie import st_lottie
+
+import instrumentation
+import startup
+import what_if
+from artifacts import load_bundle
+from lottie_assets import LOTTIE_URL, load_lottie
+from scorer import load_scorer
+
+# --- Start loading the model while the page renders (no-op after the first run) ---
+startup.warm_up()
 
 # --- Color Palette ---
 PRIMARY_COLOR = "#6C47FF"      # Purple
@@ -17,76 +21,107 @@ DESC_COLOR = "#FFD580"         # Light gold for description
 # --- Set page config for wide layout ---
 st.set_page_config(layout="wide", page_title="Salary Predictor", page_icon="💼")
 
-# --- Lottie Animation Function ---
-def load_lottieurl(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+# --- Opt-in timing of this rerun (SALARY_INSTRUMENT=1, SALARY_PROFILE=path.prof) ---
+rerun = instrumentation.begin_run('home')
+try:
+    # --- Lottie Animation (cached on disk, never blocks on the network) ---
+    with instrumentation.stage('home.lottie'):
+        lottie_json = load_lottie(LOTTIE_URL)
+
+    # --- Custom Header for Dark Theme ---
+    st.markdown(f"""
+    <div style='background: {HEADER_BG}; padding: 1.5rem 2vw 1rem 2vw; border-radius: 1.2rem; margin-bottom: 2em; width: 60vw; margin-left: auto; margin-right: auto; box-shadow: 0 4px 24px 0 rgba(35,25,66,0.18); border: 1.5px solid #3d2c5a; text-align: center;'>
+        <h1 style='color: {TEXT_COLOR}; font-size: 2.7em; margin-bottom: 0.2em;'>💼 Salary Predictor</h1>
+        <p style='color: #bdbdbd; font-size: 1.2em; margin-top: 0;'>Employee Salary Prediction</p>
+        <p style='color: {DESC_COLOR}; font-size: 1.05em; margin-top: 0.2em;'>Enter employee details to predict salary and explore HR analytics with interactive visualizations.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    if lottie_json:
+        from streamlit_lottie import st_lottie
+
+        st_lottie(lottie_json, height=120, key="home_anim")
+
+    # --- Load models and encoders ---
+    with instrumentation.stage('home.load_artifacts'):
+        scorer = load_scorer()
+        # The compiled scorer carries the encoder categories; only other models need the bundle
+        bundle = load_bundle() if scorer is None else None
+    if scorer is not None:
+        gender_options = list(scorer.sex_weights)
+        unit_options = list(scorer.category_weights['UNIT'])
+        designation_options = list(scorer.category_weights['DESIGNATION'])
+    else:
+        gender_options = list(bundle['label_encoder_sex'].classes_)
+        unit_options = list(bundle['onehot_encoder_unit'].categories_[0])
+        designation_options = list(bundle['onehot_encoder_des'].categories_[0])
 
-# --- Lottie Animation URL (e.g., business/finance animation) ---
-lottie_url = "https://assets2.lottiefiles.com/packages/lf20_ktwnwv5m.json"
-lottie_json = load_lottieurl(lottie_url)
+    # --- Input Form in Card ---
+    with st.form("salary_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            age = st.number_input("Age", min_value=18, max_value=70, value=30, step=1, key="age")
+            gender = st.selectbox("Gender", gender_options, key="gender")
+            unit = st.selectbox("Unit/Department", unit_options, key="unit")
+        with col2:
+            designation = st.selectbox("Designation", designation_options, key="designation")
+            ratings = st.slider("Performance Rating", min_value=1.0, max_value=5.0, value=3.0, step=0.1, key="ratings")
+            experience = st.number_input("Years of Experience", min_value=0, max_value=50, value=5, step=1, key="experience")
+        submitted = st.form_submit_button("Predict Salary", use_container_width=True)
 
-# --- Custom Header for Dark Theme ---
-st.markdown(f"""
-<div style='background: {HEADER_BG}; padding: 1.5rem 2vw 1rem 2vw; border-radius: 1.2rem; margin-bottom: 2em; width: 60vw; margin-left: auto; margin-right: auto; box-shadow: 0 4px 24px 0 rgba(35,25,66,0.18); border: 1.5px solid #3d2c5a; text-align: center;'>
-    <h1 style='color: {TEXT_COLOR}; font-size: 2.7em; margin-bottom: 0.2em;'>💼 Salary Predictor</h1>
-    <p style='color: #bdbdbd; font-size: 1.2em; margin-top: 0;'>Employee Salary Prediction</p>
-    <p style='color: {DESC_COLOR}; font-size: 1.05em; margin-top: 0.2em;'>Enter employee details to predict salary and explore HR analytics with interactive visualizations.</p>
-</div>
-""", unsafe_allow_html=True)
+    # --- Prediction Logic ---
+    if submitted:
+        try:
+            with instrumentation.stage('home.predict'):
+                if scorer is not None:
+                    # Folded linear model: a few lookups, no sklearn validation
+                    predicted_salary = scorer.score(gender, designation, age, unit, ratings, experience)
+                else:
+                    # Encode, scale and predict through the shared batch path
+                    import pandas as pd
+                    from predict import predict_batch
 
-# --- Load models and encoders ---
-with open('model.pkl', 'rb') as f:
-    model = pickle.load(f)
-with open('label_encoder_sex.pkl','rb') as file:
-    label_encoder_sex = pickle.load(file)
-with open('onehot_encoder_des.pkl','rb') as file:
-    onehot_encoder_des = pickle.load(file)
-with open('onehot_encoder_unit.pkl','rb') as file:
-    onehot_encoder_unit = pickle.load(file)
-with open('scaler.pkl','rb') as file:
-    scaler = pickle.load(file)
+                    input_df = pd.DataFrame([{
+                        'SEX': gender, 'DESIGNATION': designation, 'AGE': age,
+                        'UNIT': unit, 'RATINGS': ratings, 'PAST EXP': experience,
+                    }])
+                    predicted_salary = predict_batch(input_df, bundle)[0]
+            st.markdown(f"""
+            <div style='background: linear-gradient(90deg, #fbeee6 60%, #f6f3ff 100%); border-left: 8px solid {ACCENT_COLOR}; padding: 2em 2vw; margin-top: 2.5em; border-radius: 1em; width: 100vw; position: relative; left: 50%; right: 50%; margin-left: -50vw; margin-right: -50vw;'>
+                <h3 style='color: {ACCENT_COLOR}; font-size: 2em; margin-bottom: 0.2em; text-align: center;'>Estimated Salary</h3>
+                <p style='font-size: 3em; color: {PRIMARY_COLOR}; font-weight: bold; text-align: center;'>${predicted_salary:,.2f}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            st.balloons()
 
-# --- Input Form in Card ---
-with st.form("salary_form"):
-    col1, col2 = st.columns(2)
-    with col1:
-        age = st.number_input("Age", min_value=18, max_value=70, value=30, step=1, key="age")
-        gender_options = list(label_encoder_sex.classes_)
-        gender = st.selectbox("Gender", gender_options, key="gender")
-        unit_options = list(onehot_encoder_unit.categories_[0])
-        unit = st.selectbox("Unit/Department", unit_options, key="unit")
-    with col2:
-        designation_options = list(onehot_encoder_des.categories_[0])
-        designation = st.selectbox("Designation", designation_options, key="designation")
-        ratings = st.slider("Performance Rating", min_value=1.0, max_value=5.0, value=3.0, step=0.1, key="ratings")
-        experience = st.number_input("Years of Experience", min_value=0, max_value=50, value=5, step=1, key="experience")
-    submitted = st.form_submit_button("Predict Salary", use_container_width=True)
+            # --- What-if: the whole experience x rating grid for this employee, scored in one call ---
+            with instrumentation.stage('home.what_if'):
+                grid = what_if.salary_grid(gender, designation, age, unit, scorer=scorer, bundle=bundle)
+            import plotly.graph_objects as go
 
-# --- Prediction Logic ---
-if submitted:
-    try:
-        # Encode categorical features
-        gender_encoded = label_encoder_sex.transform([gender])[0]
-        designation_encoded = onehot_encoder_des.transform([[designation]]).toarray()[0]
-        unit_encoded = onehot_encoder_unit.transform([[unit]]).toarray()[0]
-        # Prepare input for scaler/model
-        input_data = np.concatenate((
-            [age, gender_encoded, ratings, experience],
-            designation_encoded,
-            unit_encoded
-        )).reshape(1, -1)
-        input_data_scaled = scaler.transform(input_data)
-        prediction = model.predict(input_data_scaled)
-        predicted_salary = prediction[0]
-        st.markdown(f"""
-        <div style='background: linear-gradient(90deg, #fbeee6 60%, #f6f3ff 100%); border-left: 8px solid {ACCENT_COLOR}; padding: 2em 2vw; margin-top: 2.5em; border-radius: 1em; width: 100vw; position: relative; left: 50%; right: 50%; margin-left: -50vw; margin-right: -50vw;'>
-            <h3 style='color: {ACCENT_COLOR}; font-size: 2em; margin-bottom: 0.2em; text-align: center;'>Estimated Salary</h3>
-            <p style='font-size: 3em; color: {PRIMARY_COLOR}; font-weight: bold; text-align: center;'>${predicted_salary:,.2f}</p>
-        </div>
-        """, unsafe_allow_html=True)
-        st.balloons()
-    except ValueError as e:
-        st.error(f"Prediction failed: {e}. Please check your input values.")
+            st.subheader("🔍 What If Experience or Rating Changed?")
+            rating_column = int(round((ratings - what_if.RATING_GRID[0]) * 10))
+            curve_col, heatmap_col = st.columns(2)
+            with curve_col:
+                fig_curve = go.Figure(go.Scatter(x=what_if.EXPERIENCE_GRID, y=grid[:, rating_column], mode='lines',
+                                                 line=dict(color=PRIMARY_COLOR), name=f'Rating {ratings:.1f}'))
+                fig_curve.add_trace(go.Scatter(x=[experience], y=[predicted_salary], mode='markers',
+                                               marker=dict(color=ACCENT_COLOR, size=12), name='Entered'))
+                fig_curve.update_layout(title=f'Salary vs. Experience at Rating {ratings:.1f}', height=380,
+                                        xaxis_title='Years of Experience', yaxis_title='Predicted Salary',
+                                        margin=dict(l=10, r=10, t=40, b=10), showlegend=False)
+                st.plotly_chart(fig_curve, use_container_width=True)
+            with heatmap_col:
+                fig_heatmap = go.Figure(go.Heatmap(z=grid.T, x=what_if.EXPERIENCE_GRID, y=what_if.RATING_GRID,
+                                                   colorscale='Viridis', colorbar=dict(title='Salary'),
+                                                   hovertemplate='Experience %{x}<br>Rating %{y}<br>Salary %{z:,.0f}<extra></extra>'))
+                fig_heatmap.add_trace(go.Scatter(x=[experience], y=[ratings], mode='markers',
+                                                 marker=dict(color=ACCENT_COLOR, size=12, symbol='x'), showlegend=False))
+                fig_heatmap.update_layout(title='Salary by Experience and Rating', height=380,
+                                          xaxis_title='Years of Experience', yaxis_title='Performance Rating',
+                                          margin=dict(l=10, r=10, t=40, b=10))
+                st.plotly_chart(fig_heatmap, use_container_width=True)
+        except ValueError as e:
+            st.error(f"Prediction failed: {e}. Please check your input values.")
+finally:
+    # Also when Streamlit interrupts the script to rerun or stop it
+    instrumentation.end_run(rerun)
@@ -0,0 +1,218 @@
+"""Precomputed aggregates behind every chart on the Explore page.
+
+``compute_aggregates`` derives all the counts, means and distributions the
+page plots from one shared UNIT x SEX x DESIGNATION group table plus a few
+column passes, so no chart has to group the raw rows again.
+``load_aggregates`` reads the typed dataset (see ``dataset.py``) and keeps
+the result per dataset version (file mtime and size) for the whole
+process. It also persists the result under ``.cache/aggregates``, so a
+cold process only recomputes it when the dataset changes.
+
+Usage:
+    python aggregates.py    # precompute the aggregates for the dataset
+"""
+import hashlib
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset import dataset_path, read_dataset
+from instrumentation import count, stage
+
+CACHE_DIR = os.path.join('.cache', 'aggregates')
+AGGREGATES_VERSION = 2
+
+# Experience buckets shared by the average salary and head count charts
+EXP_BINS = [0, 2, 5, 10, 20, 50]
+EXP_LABELS = ['0-2', '3-5', '6-10', '11-20', '20+']
+HISTOGRAM_BINS = 20
+# Scatter plots beyond this many points are unreadable and slow to ship to the browser
+SCATTER_SAMPLE = 5000
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _box_stats(data, by):
+    """Matplotlib ``bxp`` statistics of SALARY for every value of ``by``.
+
+    Matches ``DataFrame.boxplot(column='SALARY', by=by)``: linear quartiles,
+    whiskers at the furthest points within 1.5 IQR and everything beyond
+    them as fliers, with groups in sorted order.
+    """
+    salary = data[[by, 'SALARY']].dropna()
+    grouped = salary.groupby(by, observed=True)['SALARY']
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = quartiles[0.75] - quartiles[0.25]
+    low = (quartiles[0.25] - 1.5 * iqr).reindex(salary[by]).to_numpy()
+    high = (quartiles[0.75] + 1.5 * iqr).reindex(salary[by]).to_numpy()
+    values = salary['SALARY'].to_numpy()
+    inside = (values >= low) & (values <= high)
+    whiskers = salary[inside].groupby(by, observed=True)['SALARY'].agg(['min', 'max'])
+    fliers = {label: group.to_numpy() for label, group in salary[~inside].groupby(by, observed=True)['SALARY']}
+
+    stats = []
+    for label in sorted(quartiles.index):
+        stats.append({
+            'label': str(label),
+            'q1': quartiles.at[label, 0.25],
+            'med': quartiles.at[label, 0.5],
+            'q3': quartiles.at[label, 0.75],
+            'whislo': whiskers.at[label, 'min'],
+            'whishi': whiskers.at[label, 'max'],
+            'fliers': fliers.get(label, np.empty(0)),
+        })
+    return stats
+
+
+def _mean(table):
+    return table['sum'] / table['count']
+
+
+def compute_aggregates(data):
+    """Compute every Explore page aggregate from a DataFrame of raw rows."""
+    columns = set(data.columns)
+    agg = {'rows': len(data)}
+
+    # One group table over the categorical columns; every count and mean
+    # by UNIT, SEX and DESIGNATION below is a roll-up of it
+    keys = [c for c in ('UNIT', 'SEX', 'DESIGNATION') if c in columns]
+    base = data.groupby(keys, dropna=False, observed=True)['SALARY'].agg(['sum', 'count', 'size'])
+
+    def roll_up(*levels):
+        return base.groupby(level=list(levels), observed=True).sum()
+
+    if 'DESIGNATION' in columns:
+        agg['designation_count'] = roll_up('DESIGNATION')['size'].sort_values(ascending=False)
+        agg['median_salary_by_designation'] = (
+            data.groupby('DESIGNATION', observed=True)['SALARY'].median().sort_values(ascending=False))
+        agg['box_designation'] = _box_stats(data, 'DESIGNATION')
+    if 'UNIT' in columns:
+        agg['unit_count'] = roll_up('UNIT')['size'].sort_values(ascending=False)
+        agg['salary_by_unit'] = _mean(roll_up('UNIT')).sort_values(ascending=False)
+        agg['box_unit'] = _box_stats(data, 'UNIT')
+    if 'SEX' in columns:
+        agg['box_sex'] = _box_stats(data, 'SEX')
+
+    if {'UNIT', 'SEX', 'DESIGNATION'} <= columns:
+        # Average salary by designation for each unit/gender animation frame,
+        # in the order the units and genders first appear in the data
+        known = base.index.to_frame().notna().all(axis=1).to_numpy()
+        by_group = _mean(base[known]).rename('SALARY')
+        pairs = set(by_group.index.droplevel('DESIGNATION'))
+        frames = {}
+        for unit in pd.unique(data['UNIT'].dropna()):
+            for sex in pd.unique(data['SEX'].dropna()):
+                if (unit, sex) in pairs:
+                    group = by_group.loc[(unit, sex)].reset_index()
+                    frames[(unit, sex)] = group.sort_values('SALARY', ascending=False)
+        agg['designation_salary_frames'] = frames
+    elif 'DESIGNATION' in columns:
+        anim_col = 'UNIT' if 'UNIT' in columns else 'SEX' if 'SEX' in columns else 'DESIGNATION'
+        group = data.groupby([anim_col, 'DESIGNATION'], observed=True)['SALARY'].mean().reset_index()
+        agg['designation_salary_animation'] = (anim_col, group.sort_values([anim_col, 'SALARY'], ascending=[True, False]))
+
+    if {'UNIT', 'SEX'} <= columns:
+        unit_sex = roll_up('UNIT', 'SEX')
+        agg['gender_by_unit'] = unit_sex['size'].unstack(fill_value=0)
+        paygap = _mean(unit_sex).unstack()
+        paygap.columns = paygap.columns.astype(object)
+        paygap['Gap'] = paygap.max(axis=1) - paygap.min(axis=1)
+        agg['paygap'] = paygap.sort_values('Gap', ascending=False)
+
+    # Filter choices for the sidebar, so it needs no raw rows
+    agg['categories'] = {c: sorted(data[c].dropna().unique()) for c in ('UNIT', 'DESIGNATION', 'SEX') if c in columns}
+    agg['extents'] = {}
+    for c in ('PAST EXP', 'RATINGS'):
+        if c in columns and data[c].notna().any():
+            agg['extents'][c] = (float(data[c].min()), float(data[c].max()))
+
+    # Distributions and correlations over the numeric columns
+    salary = data['SALARY'].dropna().to_numpy()
+    agg['salary_max'] = salary.max() if len(salary) else 0.0
+    agg['salary_histogram'] = np.histogram(salary, bins=HISTOGRAM_BINS)
+    missing = data.isnull().sum()
+    agg['missing'] = missing[missing > 0]
+    agg['corr'] = data.select_dtypes(include='number').corr()
+    agg['top10'] = data.nlargest(10, 'SALARY').reset_index(drop=True)
+
+    if 'PAST EXP' in columns:
+        # Bucket experience once for both bucket charts
+        buckets = pd.cut(data['PAST EXP'], bins=EXP_BINS, labels=EXP_LABELS, right=False)
+        agg['salary_by_exp_bucket'] = data['SALARY'].groupby(buckets, observed=False).mean().rename_axis('EXP_BUCKET')
+        agg['count_by_exp_bucket'] = buckets.value_counts().sort_index()
+        scatter_cols = [c for c in ('PAST EXP', 'SALARY', 'DESIGNATION') if c in columns]
+        scatter = data[scatter_cols]
+        if len(scatter) > SCATTER_SAMPLE:
+            scatter = scatter.sample(n=SCATTER_SAMPLE, random_state=0)
+        agg['exp_scatter'] = scatter.reset_index(drop=True)
+        if 'UNIT' in columns:
+            agg['salary_by_exp_unit'] = data.groupby(['PAST EXP', 'UNIT'], observed=True)['SALARY'].mean().reset_index()
+    return agg
+
+
+def dataset_version(path):
+    """Identify a dataset file by its mtime and size."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _cache_path(path, version, cache_dir):
+    key = f'{os.path.abspath(path)}:{version}:{AGGREGATES_VERSION}'
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + '.joblib')
+
+
+def load_aggregates(path=None, cache_dir=CACHE_DIR, persist=True):
+    """Return the aggregates for ``path``, computing them at most once per file version.
+
+    ``path`` defaults to the Parquet dataset when it is current, else the CSV.
+
+    With ``persist`` the result is also read from and written to
+    ``cache_dir``, so a new process skips the computation as long as the
+    dataset has not changed.
+    """
+    path = os.path.abspath(dataset_path() if path is None else path)
+    version = dataset_version(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        agg = None
+        cache_path = _cache_path(path, version, cache_dir)
+        if persist and os.path.exists(cache_path):
+            try:
+                with stage('aggregates.load_cache'):
+                    agg = joblib.load(cache_path)
+                count('aggregates.disk_hit')
+            except Exception:
+                # A corrupt or incompatible cache file is simply recomputed
+                agg = None
+        if agg is None:
+            with stage('aggregates.read'):
+                data = read_dataset(path)
+            with stage('aggregates.compute'):
+                agg = compute_aggregates(data)
+            if persist:
+                # Write atomically; a read-only deployment just keeps the in-memory copy
+                tmp_path = f'{cache_path}.tmp'
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    joblib.dump(agg, tmp_path)
+                    os.replace(tmp_path, cache_path)
+                except OSError:
+                    pass
+        _cache[path] = (version, agg)
+        return agg
+
+
+if __name__ == '__main__':
+    agg = load_aggregates()
+    print(f'Cached aggregates for {agg["rows"]} rows of {dataset_path()}')
@@ -0,0 +1,145 @@
+"""Single, versioned model artifact shared by every page and script.
+
+The encoders, scaler, feature order and model are stored together in one
+uncompressed joblib file so the numpy arrays inside can be memory-mapped.
+``load_bundle`` keeps the loaded bundle for the whole process and only
+reloads it when the file's mtime or size changes, so a retrained artifact is
+picked up without restarting the app. joblib and sklearn are imported
+only when a bundle is actually read or written, so importing this module
+stays cheap for a cold process that predicts from ``scorer.load_scorer``.
+
+The least-squares statistics behind the linear model are kept in a second
+file, ``salary_model.stats.joblib``, so ``train_sklearn_model.py --update``
+can fold new rows into the model without rereading the whole history.
+
+Usage:
+    python artifacts.py    # build salary_model.joblib from the legacy pickles
+"""
+import os
+import pickle
+import threading
+
+from instrumentation import stage
+
+ARTIFACT_PATH = 'salary_model.joblib'
+BUNDLE_VERSION = 1
+STATS_PATH = 'salary_model.stats.joblib'
+STATS_VERSION = 1
+
+# Separate pickles written by earlier versions of the trainer
+LEGACY_FILES = {
+    'model': 'model.pkl',
+    'label_encoder_sex': 'label_encoder_sex.pkl',
+    'onehot_encoder_des': 'onehot_encoder_des.pkl',
+    'onehot_encoder_unit': 'onehot_encoder_unit.pkl',
+    'scaler': 'scaler.pkl',
+    'feature_order': 'feature_order.pkl',
+}
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def build_bundle(model, label_encoder_sex, onehot_encoder_des, onehot_encoder_unit, scaler, feature_order):
+    """Package all fitted objects into one bundle dict."""
+    import sklearn
+
+    return {
+        'version': BUNDLE_VERSION,
+        'sklearn_version': sklearn.__version__,
+        'model': model,
+        'label_encoder_sex': label_encoder_sex,
+        'onehot_encoder_des': onehot_encoder_des,
+        'onehot_encoder_unit': onehot_encoder_unit,
+        'scaler': scaler,
+        'feature_order': list(feature_order),
+    }
+
+
+def save_bundle(bundle, path=ARTIFACT_PATH):
+    """Write the bundle atomically so running apps never read a partial file."""
+    import joblib
+
+    tmp_path = f'{path}.tmp'
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_stats(stats, imputer, feature_order, path=STATS_PATH):
+    """Write the training statistics and fitted imputer next to the bundle."""
+    import joblib
+
+    state = {
+        'version': STATS_VERSION,
+        'stats': stats,
+        'imputer': imputer,
+        'feature_order': list(feature_order),
+    }
+    tmp_path = f'{path}.tmp'
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_stats(path=STATS_PATH):
+    """Return the state written by ``save_stats``."""
+    import joblib
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'No training statistics at {path}; run a full training first')
+    state = joblib.load(path)
+    if state.get('version') != STATS_VERSION:
+        raise ValueError(f'Unsupported training statistics version {state.get("version")!r} in {path}')
+    return state
+
+
+def bundle_from_pickles(directory='.'):
+    """Assemble a bundle from the legacy per-object pickles."""
+    objects = {}
+    for key, filename in LEGACY_FILES.items():
+        with open(os.path.join(directory, filename), 'rb') as file:
+            objects[key] = pickle.load(file)
+    return build_bundle(**objects)
+
+
+def _fingerprint(paths):
+    return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths)
+
+
+def load_bundle(path=ARTIFACT_PATH):
+    """Return the model bundle, loading it at most once per file version.
+
+    Falls back to the legacy pickles next to ``path`` when the bundle file
+    has not been built yet.
+    """
+    path = os.path.abspath(path)
+    if os.path.exists(path):
+        sources = [path]
+    else:
+        directory = os.path.dirname(path)
+        sources = [os.path.join(directory, f) for f in LEGACY_FILES.values()]
+
+    fingerprint = _fingerprint(sources)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        with stage('artifacts.load'):
+            if sources == [path]:
+                import joblib
+
+                bundle = joblib.load(path, mmap_mode='r')
+                if bundle.get('version') != BUNDLE_VERSION:
+                    raise ValueError(f'Unsupported model bundle version {bundle.get("version")!r} in {path}')
+            else:
+                bundle = bundle_from_pickles(os.path.dirname(path))
+        _cache[path] = (fingerprint, bundle)
+        return bundle
+
+
+if __name__ == '__main__':
+    save_bundle(bundle_from_pickles())
+    print(f'Saved {ARTIFACT_PATH}')
@@ -0,0 +1,36 @@
+"""Score an employee CSV file in chunks and write the predictions out.
+
+Usage:
+    python batch_predict.py input.csv output.csv [--chunksize 100000]
+
+The output keeps every input column and appends the predicted salary, so
+memory use is bounded by the chunk size rather than the file size.
+"""
+import argparse
+
+import pandas as pd
+
+from artifacts import load_bundle
+from predict import predict_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Predict salaries for every row of a CSV file.')
+    parser.add_argument('input', help='CSV with SEX, DESIGNATION, AGE, UNIT, RATINGS and PAST EXP columns')
+    parser.add_argument('output', help='CSV file to write the predictions to')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows scored per chunk')
+    parser.add_argument('--column', default='PREDICTED SALARY', help='name of the prediction column')
+    args = parser.parse_args()
+
+    bundle = load_bundle()
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(args.input, chunksize=args.chunksize)):
+        chunk[args.column] = predict_batch(chunk, bundle)
+        chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(chunk)
+
+    print(f'Scored {rows} rows into {args.output}')
+
+
+if __name__ == '__main__':
+    main()
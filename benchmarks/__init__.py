@@ -0,0 +1 @@
+"""Performance benchmarks and the synthetic data they run on."""
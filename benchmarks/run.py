@@ -0,0 +1,179 @@
+"""Run the performance benchmarks on synthetic datasets.
+
+Usage:
+    python -m benchmarks.run [--rows 10000 100000 1000000] [--output bench_results.json]
+                             [--compare baseline.json] [--tolerance 0.2]
+
+For every size a synthetic file is generated once (and cached under
+``.cache/benchmarks``), then the suite times:
+
+* loading the dataset from CSV and from Parquet
+* in-memory and streaming training, with peak traced memory
+* single-row prediction through the Home page path and ``predict_batch``
+* batch prediction over the whole file
+* the Explore page aggregates
+
+Results go to a JSON file. With ``--compare`` each timing is checked
+against an earlier results file and the run exits non-zero when any of
+them is more than ``--tolerance`` slower.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from aggregates import compute_aggregates
+from artifacts import load_bundle
+from benchmarks.synthetic import generate
+from dataset import ingest, read_csv, read_parquet
+from features import INPUT_COLUMNS
+from imputation import make_imputer
+from predict import predict_batch
+from scorer import get_scorer
+from train_sklearn_model import train_in_memory, train_streaming
+
+CACHE_DIR = os.path.join('.cache', 'benchmarks')
+DEFAULT_SIZES = [10_000, 100_000]
+SINGLE_ROW_REPEATS = 1000
+
+
+def measure(func, repeat=3, trace_memory=False):
+    """Time ``func`` ``repeat`` times; optionally record its peak traced memory.
+
+    Memory is traced in an extra, untimed run because tracing slows
+    allocation-heavy code down severalfold.
+    """
+    result = {}
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    result.update({'min_s': min(timings), 'median_s': statistics.median(timings), 'repeat': repeat})
+    return result
+
+
+def synthetic_files(rows, seed=0):
+    """Return the cached synthetic CSV and Parquet files for ``rows`` employees."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    csv_path = os.path.join(CACHE_DIR, f'synthetic_{rows}_{seed}.csv')
+    parquet_path = os.path.join(CACHE_DIR, f'synthetic_{rows}_{seed}.parquet')
+    if not os.path.exists(csv_path):
+        generate(rows, csv_path, seed=seed)
+    if not os.path.exists(parquet_path):
+        ingest(csv_path, parquet_path)
+    return csv_path, parquet_path
+
+
+def run_size(rows, bundle, repeat):
+    csv_path, parquet_path = synthetic_files(rows)
+    results = {}
+
+    results['load_csv'] = measure(lambda: read_csv(csv_path), repeat)
+    results['load_parquet'] = measure(lambda: read_parquet(parquet_path), repeat)
+    results['load_parquet_model_columns'] = measure(
+        lambda: read_parquet(parquet_path, columns=INPUT_COLUMNS + ['SALARY']), repeat)
+
+    # The Parquet copy is written after the CSV, so the trainers read it
+    source = {'csv_path': csv_path, 'parquet_path': parquet_path}
+    results['train_in_memory'] = measure(
+        lambda: train_in_memory(bundle, make_imputer(), **source), repeat, trace_memory=True)
+    results['train_streaming'] = measure(
+        lambda: train_streaming(bundle, make_imputer(), max(rows // 10, 1), **source), repeat, trace_memory=True)
+
+    data = read_parquet(parquet_path)
+    inputs = data[INPUT_COLUMNS].dropna().reset_index(drop=True)
+    results['predict_batch'] = measure(lambda: predict_batch(inputs, bundle), repeat, trace_memory=True)
+    results['aggregates'] = measure(lambda: compute_aggregates(data), repeat, trace_memory=True)
+    return results
+
+
+def run_single_row(bundle, repeat):
+    """Per-call latency of one prediction, as the Home page makes it."""
+    row = {'SEX': 'F', 'DESIGNATION': 'Analyst', 'AGE': 30, 'UNIT': 'IT', 'RATINGS': 3.0, 'PAST EXP': 5}
+    frame = pd.DataFrame([row])
+    scorer = get_scorer(bundle)
+    results = {}
+
+    def per_call(func):
+        timing = measure(lambda: [func() for _ in range(SINGLE_ROW_REPEATS)], repeat)
+        return {key: value / SINGLE_ROW_REPEATS if key.endswith('_s') else value for key, value in timing.items()}
+
+    results['predict_batch_one_row'] = per_call(lambda: predict_batch(frame, bundle))
+    if scorer is not None:
+        results['scorer_one_row'] = per_call(lambda: scorer.score('F', 'Analyst', 30, 'IT', 3.0, 5))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the benchmarks more than ``tolerance`` slower than ``baseline``."""
+    regressions = []
+    for size, benchmarks in results['results'].items():
+        for name, timing in benchmarks.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if before and timing['min_s'] > before['min_s'] * (1 + tolerance):
+                regressions.append((size, name, before['min_s'], timing['min_s']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training, prediction and aggregation.')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_SIZES, help='synthetic dataset sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark')
+    parser.add_argument('--output', default='bench_results.json', help='JSON file to write the results to')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown against the baseline')
+    args = parser.parse_args()
+
+    bundle = load_bundle()
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'model': type(bundle['model']).__name__,
+        },
+        'results': {'single_row': run_single_row(bundle, args.repeat)},
+    }
+    for rows in args.rows:
+        print(f'Benchmarking {rows} rows...')
+        results['results'][str(rows)] = run_size(rows, bundle, args.repeat)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    for size, benchmarks in results['results'].items():
+        for name, timing in benchmarks.items():
+            peak = f"  peak {timing['peak_mb']:.1f} MB" if 'peak_mb' in timing else ''
+            print(f'{size:>10}  {name:<28} {timing["min_s"] * 1000:10.3f} ms{peak}')
+    print(f'Wrote {args.output}')
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for size, name, before, after in regressions:
+            print(f'REGRESSION {size} {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
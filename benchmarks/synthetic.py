@@ -0,0 +1,119 @@
+"""Synthetic employee files with the same schema as ``salary prediction.csv``.
+
+Each designation has its own share of employees and salary, experience and
+age ranges taken from the real dataset, so group sizes, pay gaps and
+correlations look like the real data at any scale. Every column the real
+file has gaps in gets missing values at ``missing_rate``. Rows are built
+and written in vectorized chunks, so 10M-row files need only one chunk of
+memory.
+
+Usage:
+    python -m benchmarks.synthetic 1000000 synthetic.csv [--seed 0] [--parquet]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['FIRST NAME', 'LAST NAME', 'SEX', 'DOJ', 'CURRENT DATE', 'DESIGNATION', 'AGE', 'SALARY',
+           'UNIT', 'LEAVES USED', 'LEAVES REMAINING', 'RATINGS', 'PAST EXP']
+# Designation -> (share of employees, salary range, experience range, age range)
+DESIGNATIONS = {
+    'Analyst': (0.74, (40_000, 50_000), (0, 3), (21, 25)),
+    'Senior Analyst': (0.135, (50_000, 70_000), (0, 5), (25, 28)),
+    'Associate': (0.06, (70_000, 100_000), (0, 9), (28, 32)),
+    'Manager': (0.03, (100_000, 149_000), (2, 12), (32, 35)),
+    'Senior Manager': (0.023, (151_000, 200_000), (6, 17), (35, 39)),
+    'Director': (0.012, (214_000, 390_000), (10, 23), (39, 45)),
+}
+UNITS = ['IT', 'Finance', 'Operations', 'Marketing', 'Web', 'Management']
+SEXES = ['F', 'M']
+RATINGS = [2.0, 3.0, 4.0, 5.0]
+TOTAL_LEAVES = 30
+CURRENT_DATE = '01-07-2016'
+# Columns with gaps in the real file
+MISSING_COLUMNS = ['LAST NAME', 'DOJ', 'AGE', 'LEAVES USED', 'LEAVES REMAINING', 'RATINGS']
+MISSING_RATE = 0.001
+
+_SYLLABLES = ['AN', 'BE', 'CA', 'DO', 'EL', 'FA', 'GI', 'HO', 'IS', 'JA', 'KE', 'LI', 'MA', 'NO', 'OR',
+              'PE', 'RA', 'SA', 'TI', 'VA']
+
+
+def _names(rng, size):
+    """Random two or three syllable names."""
+    pool = np.array([a + b for a in _SYLLABLES for b in _SYLLABLES]
+                    + [a + b + c for a in _SYLLABLES[:8] for b in _SYLLABLES for c in _SYLLABLES[8:]])
+    return pool[rng.integers(len(pool), size=size)]
+
+
+def generate_chunk(rows, rng, missing_rate=MISSING_RATE):
+    """Return a DataFrame of ``rows`` synthetic employees."""
+    names = list(DESIGNATIONS)
+    shares = np.array([DESIGNATIONS[n][0] for n in names])
+    designation = rng.choice(len(names), size=rows, p=shares / shares.sum())
+
+    def integers(index):
+        """Whole numbers drawn uniformly from each row's range, both ends included."""
+        low = np.array([DESIGNATIONS[n][index][0] for n in names])[designation]
+        high = np.array([DESIGNATIONS[n][index][1] for n in names])[designation]
+        return rng.integers(low, high + 1).astype(float)
+
+    leaves_used = rng.integers(15, TOTAL_LEAVES + 1, size=rows).astype(float)
+    doj = pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 6 * 365, size=rows), unit='D')
+    data = pd.DataFrame({
+        'FIRST NAME': _names(rng, rows),
+        'LAST NAME': _names(rng, rows).astype(object),
+        'SEX': np.array(SEXES)[rng.integers(len(SEXES), size=rows)],
+        'DOJ': doj.strftime('%m-%d-%Y').to_numpy(dtype=object),
+        'CURRENT DATE': CURRENT_DATE,
+        'DESIGNATION': np.array(names)[designation],
+        'AGE': integers(3),
+        'SALARY': integers(1),
+        'UNIT': np.array(UNITS)[rng.integers(len(UNITS), size=rows)],
+        'LEAVES USED': leaves_used,
+        'LEAVES REMAINING': TOTAL_LEAVES - leaves_used,
+        'RATINGS': np.array(RATINGS)[rng.integers(len(RATINGS), size=rows)],
+        'PAST EXP': integers(2),
+    }, columns=COLUMNS)
+    for column in MISSING_COLUMNS:
+        missing = rng.random(rows) < missing_rate
+        data.loc[missing, column] = np.nan
+    return data
+
+
+def generate(rows, path, seed=0, missing_rate=MISSING_RATE, chunksize=1_000_000):
+    """Write ``rows`` synthetic employees to the CSV file ``path``."""
+    rng = np.random.default_rng(seed)
+    tmp_path = f'{path}.tmp'
+    written = 0
+    while written < rows:
+        chunk = generate_chunk(min(chunksize, rows - written), rng, missing_rate)
+        chunk.to_csv(tmp_path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(chunk)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic salary dataset.')
+    parser.add_argument('rows', type=int, help='number of employees to generate')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--missing-rate', type=float, default=MISSING_RATE,
+                        help='share of missing values in each column with gaps')
+    parser.add_argument('--parquet', action='store_true', help='also convert the file to Parquet')
+    args = parser.parse_args()
+
+    generate(args.rows, args.output, args.seed, args.missing_rate)
+    print(f'Wrote {args.rows} rows to {args.output}')
+    if args.parquet:
+        from dataset import ingest
+
+        parquet_path = os.path.splitext(args.output)[0] + '.parquet'
+        ingest(args.output, parquet_path)
+        print(f'Wrote {parquet_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Typed, columnar copy of the salary dataset.
+
+``ingest`` converts the CSV into a Parquet file once: SEX, DESIGNATION and
+UNIT are dictionary encoded and come back as pandas categoricals, DOJ and
+CURRENT DATE are stored as dates and the numeric columns use compact
+types. ``load_dataset`` reads that file through a memory map, only
+materializing the requested columns, and falls back to parsing the CSV
+with the same dtypes while the Parquet file is missing or older than it.
+
+Usage:
+    python dataset.py    # convert salary prediction.csv to Parquet
+"""
+import os
+
+import pandas as pd
+
+CSV_PATH = 'salary prediction.csv'
+PARQUET_PATH = 'salary prediction.parquet'
+
+CATEGORICAL_COLUMNS = ['SEX', 'DESIGNATION', 'UNIT']
+DATE_COLUMNS = ['DOJ', 'CURRENT DATE']
+DATE_FORMAT = '%m-%d-%Y'
+# Small counts and ratings fit float32 exactly enough; SALARY keeps float64 for aggregation
+NUMERIC_DTYPES = {
+    'AGE': 'float32',
+    'SALARY': 'float64',
+    'LEAVES USED': 'float32',
+    'LEAVES REMAINING': 'float32',
+    'RATINGS': 'float32',
+    'PAST EXP': 'float32',
+}
+STRING_COLUMNS = ['FIRST NAME', 'LAST NAME']
+
+
+def _csv_dtypes(columns=None):
+    dtypes = dict(NUMERIC_DTYPES)
+    dtypes.update({c: 'category' for c in CATEGORICAL_COLUMNS})
+    dtypes.update({c: 'object' for c in STRING_COLUMNS + DATE_COLUMNS})
+    if columns is not None:
+        dtypes = {c: t for c, t in dtypes.items() if c in columns}
+    return dtypes
+
+
+def _parse_dates(data):
+    for column in DATE_COLUMNS:
+        if column in data.columns:
+            data[column] = pd.to_datetime(data[column], format=DATE_FORMAT, errors='coerce')
+    return data
+
+
+def read_csv(path=CSV_PATH, columns=None, **kwargs):
+    """Parse the CSV with the same column types the Parquet file stores."""
+    data = pd.read_csv(path, usecols=columns, dtype=_csv_dtypes(columns), **kwargs)
+    if 'chunksize' in kwargs:
+        return (_parse_dates(chunk) for chunk in data)
+    return _parse_dates(data)
+
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {c: pa.string() for c in CATEGORICAL_COLUMNS + STRING_COLUMNS}
+    types.update({c: pa.timestamp('ns') for c in DATE_COLUMNS})
+    types.update({c: getattr(pa, t)() for c, t in NUMERIC_DTYPES.items()})
+    return pa.schema([(c, types[c]) for c in columns])
+
+
+def read_parquet(path=PARQUET_PATH, columns=None):
+    """Read the Parquet file through a memory map, projecting to ``columns``."""
+    import pyarrow.parquet as pq
+
+    categorical = [c for c in CATEGORICAL_COLUMNS if columns is None or c in columns]
+    table = pq.read_table(path, columns=columns, memory_map=True, read_dictionary=categorical)
+    return table.to_pandas()
+
+
+def ingest(csv_path=CSV_PATH, parquet_path=PARQUET_PATH, chunksize=1_000_000):
+    """Convert the CSV into a typed Parquet file, ``chunksize`` rows at a time.
+
+    The file is written next to its final path and moved into place, so
+    readers never see a partial file. Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = f'{parquet_path}.tmp'
+    writer = None
+    rows = 0
+    try:
+        for chunk in read_csv(csv_path, chunksize=chunksize):
+            # Categories differ between chunks, so store plain strings and let
+            # Parquet dictionary-encode them; reads turn them back into categoricals
+            for column in CATEGORICAL_COLUMNS:
+                if column in chunk.columns:
+                    chunk[column] = chunk[column].astype(object)
+            if writer is None:
+                # A fixed schema keeps all-null columns in one chunk from changing the file type
+                schema = _arrow_schema(chunk.columns)
+                writer = pq.ParquetWriter(tmp_path, schema, use_dictionary=CATEGORICAL_COLUMNS)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, parquet_path)
+    return rows
+
+
+def dataset_path(csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """Return the Parquet file if it is at least as new as the CSV, else the CSV."""
+    if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return parquet_path
+    return csv_path
+
+
+def read_dataset(path, columns=None):
+    """Read a dataset file of either format with the typed columns."""
+    if str(path).endswith('.parquet'):
+        return read_parquet(path, columns)
+    return read_csv(path, columns)
+
+
+def load_dataset(columns=None, csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """Load the dataset, or just ``columns`` of it, from the fastest available file."""
+    return read_dataset(dataset_path(csv_path, parquet_path), columns)
+
+
+def iter_dataset(columns=None, chunksize=100_000, csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """Yield the dataset as typed DataFrames of at most ``chunksize`` rows."""
+    path = dataset_path(csv_path, parquet_path)
+    if not path.endswith('.parquet'):
+        yield from read_csv(path, columns, chunksize=chunksize)
+        return
+
+    import pyarrow.parquet as pq
+
+    categorical = [c for c in CATEGORICAL_COLUMNS if columns is None or c in columns]
+    parquet_file = pq.ParquetFile(path, memory_map=True, read_dictionary=categorical)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+
+if __name__ == '__main__':
+    rows = ingest()
+    print(f'Wrote {rows} rows to {PARQUET_PATH}')
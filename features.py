@@ -0,0 +1,71 @@
+"""Vectorized feature encoding shared by the prediction and training code.
+
+scipy is imported by the sparse encoders only, so the prediction path
+does not pay for it.
+"""
+import numpy as np
+
+# Raw dataset columns the model consumes
+INPUT_COLUMNS = ['SEX', 'DESIGNATION', 'AGE', 'UNIT', 'RATINGS', 'PAST EXP']
+NUMERIC_COLUMNS = ['AGE', 'RATINGS', 'PAST EXP']
+
+
+def encode_features(data, bundle):
+    """Encode a DataFrame of raw rows into a dense matrix in ``feature_order``.
+
+    Every encoder is applied once to whole columns, so the cost is a few
+    vectorized passes regardless of the number of rows.
+    """
+    label_encoder_sex = bundle['label_encoder_sex']
+    onehot_encoder_des = bundle['onehot_encoder_des']
+    onehot_encoder_unit = bundle['onehot_encoder_unit']
+    feature_order = bundle['feature_order']
+
+    # Collect every encoded column by its feature name
+    columns = {'SEX': label_encoder_sex.transform(data['SEX'])}
+    for name in NUMERIC_COLUMNS:
+        columns[name] = data[name].to_numpy(dtype=float)
+    for encoder, source in ((onehot_encoder_des, 'DESIGNATION'), (onehot_encoder_unit, 'UNIT')):
+        encoded = encoder.transform(data[[source]]).toarray()
+        for i, name in enumerate(encoder.get_feature_names_out([source])):
+            columns[name] = encoded[:, i]
+
+    # Assemble in the order the scaler and model were fitted on
+    X = np.empty((len(data), len(feature_order)))
+    for i, name in enumerate(feature_order):
+        X[:, i] = columns[name]
+    return X
+
+
+def encode_features_sparse(data, bundle):
+    """Encode a DataFrame of raw rows into a CSR matrix in ``feature_order``.
+
+    The one-hot blocks stay sparse from the encoders to the result and are
+    stacked with the SEX and numeric columns without intermediate frames.
+    """
+    import scipy.sparse as sp
+
+    label_encoder_sex = bundle['label_encoder_sex']
+    onehot_encoder_des = bundle['onehot_encoder_des']
+    onehot_encoder_unit = bundle['onehot_encoder_unit']
+    feature_order = bundle['feature_order']
+
+    names = ['SEX'] + NUMERIC_COLUMNS
+    dense = np.column_stack([label_encoder_sex.transform(data['SEX'])]
+                            + [data[name].to_numpy(dtype=float) for name in NUMERIC_COLUMNS])
+    blocks = [sp.csc_matrix(dense)]
+    for encoder, source in ((onehot_encoder_des, 'DESIGNATION'), (onehot_encoder_unit, 'UNIT')):
+        blocks.append(sp.csc_matrix(encoder.transform(data[[source]])))
+        names.extend(encoder.get_feature_names_out([source]))
+
+    # Column selection is cheap on CSC; convert once the order is final
+    position = {name: i for i, name in enumerate(names)}
+    X = sp.hstack(blocks, format='csc')
+    return X[:, [position[name] for name in feature_order]].tocsr()
+
+
+def scaler_moments(scaler, n_features):
+    """Return the ``(mean, scale)`` a fitted StandardScaler applies."""
+    mean = np.asarray(scaler.mean_, dtype=float) if scaler.with_mean else np.zeros(n_features)
+    scale = np.asarray(scaler.scale_, dtype=float) if scaler.with_std else np.ones(n_features)
+    return mean, scale
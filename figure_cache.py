@@ -0,0 +1,51 @@
+"""Process-wide cache of rendered Explore page charts.
+
+Charts are keyed by the dataset version, the active filters and the chart
+name, so a rerun only builds the charts whose inputs changed. Matplotlib
+figures are rasterized to PNG once and closed right away; only the bytes
+are kept, so long sessions no longer accumulate open figures.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+from instrumentation import count
+
+# Charts kept across reruns and sessions; a page shows about 20
+CACHE_SIZE = 256
+PNG_DPI = 120
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def get(key, build):
+    """Return the chart cached under ``key``, calling ``build()`` to create it once."""
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            count('figures.cache_hit')
+            return _cache[key]
+    chart = build()
+    with _lock:
+        _cache[key] = chart
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return chart
+
+
+def to_png(fig, dpi=PNG_DPI):
+    """Rasterize a matplotlib figure to PNG bytes and close it."""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def clear():
+    with _lock:
+        _cache.clear()
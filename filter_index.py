@@ -0,0 +1,417 @@
+"""Precomputed cell aggregates for cross-filtering the Explore page.
+
+``FilterIndex`` is built once per dataset version. It splits the rows into
+cells, one per combination of UNIT, DESIGNATION, SEX, PAST EXP and RATINGS
+value, and keeps mergeable statistics per cell: row and salary counts,
+salary sums and maxima, null counts, a fine salary histogram, the moments
+behind the correlation matrix and each cell's highest paid rows. Every
+filter selects whole cells, so for every UNIT, DESIGNATION and SEX value
+it keeps the sorted ids of the matching cells, and for PAST EXP and
+RATINGS the cells sorted by value, so a range is two binary searches. A
+filter combination is resolved by intersecting those id arrays, smallest
+first, and the counts, means and histograms of the page are rolled up
+from the selected cells without touching a row.
+
+Only the box plots, medians and the experience scatter need rows. For
+them the index keeps two projected columns, each row's cell id and
+SALARY, in a seeded random order, so the first matching rows are a
+uniform sample. The results of recent combinations are kept.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from aggregates import EXP_BINS, EXP_LABELS, HISTOGRAM_BINS, SCATTER_SAMPLE, _mean, dataset_version
+from dataset import dataset_path, read_dataset
+from instrumentation import count, stage
+
+CATEGORY_COLUMNS = ['UNIT', 'DESIGNATION', 'SEX']
+RANGE_COLUMNS = ['PAST EXP', 'RATINGS']
+# Filter combinations whose aggregates are kept per index
+AGGREGATE_CACHE_SIZE = 32
+# Salary histogram bins kept per cell; a selection merges them into HISTOGRAM_BINS bins
+FINE_HISTOGRAM_BINS = HISTOGRAM_BINS * 10
+TOP_ROWS = 10
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _intersect(small, large):
+    """Ids in both sorted arrays, by binary search into the larger one."""
+    found = np.searchsorted(large, small)
+    found[found == len(large)] = 0
+    return small[large[found] == small] if len(large) else small[:0]
+
+
+def filter_key(filters):
+    """A hashable, order-independent key for a filter combination."""
+    # Category selections are sets; range bounds keep their order
+    return tuple(sorted((column, tuple(sorted(value)) if isinstance(value, list) else value)
+                        for column, value in filters.items()))
+
+
+def _cell_ids(data, columns):
+    """Cell id of every row and the column values of every cell (NaN where missing)."""
+    codes, levels = [], []
+    for column in columns:
+        code, uniques = pd.factorize(data[column], sort=True)
+        # 0 marks a missing value
+        codes.append(code + 1)
+        levels.append(np.asarray(uniques, dtype=object if column in CATEGORY_COLUMNS else float))
+    shape = [len(values) + 1 for values in levels]
+    keys, cell = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+    values = {}
+    for column, values_of, code in zip(columns, levels, np.unravel_index(keys, shape)):
+        column_values = np.full(len(keys), np.nan, dtype=values_of.dtype)
+        column_values[code > 0] = values_of[code[code > 0] - 1]
+        values[column] = column_values
+    return cell.ravel(), pd.DataFrame(values)
+
+
+def _sorted_quantile(values, q):
+    """Linearly interpolated quantile of an ascending array, as pandas and numpy compute it."""
+    position = q * (len(values) - 1)
+    below = int(position)
+    above = min(below + 1, len(values) - 1)
+    return values[below] + (values[above] - values[below]) * (position - below)
+
+
+def _box_stats_by_code(codes, labels, salary):
+    """``aggregates._box_stats`` of rows given as group codes (-1 where missing) and ascending salaries.
+
+    A stable sort of the small integer codes splits the rows into groups
+    that stay in salary order, so the quartiles and whiskers are lookups.
+    """
+    known = codes >= 0
+    codes, salary = codes[known], salary[known]
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=len(labels))
+    stops = np.cumsum(sizes)
+    stats = []
+    for label, start, stop in sorted(zip(labels, stops - sizes, stops)):
+        if start == stop:
+            continue
+        values = salary[order[start:stop]]
+        q1, med, q3 = (_sorted_quantile(values, q) for q in (0.25, 0.5, 0.75))
+        low = np.searchsorted(values, q1 - 1.5 * (q3 - q1), side='left')
+        high = np.searchsorted(values, q3 + 1.5 * (q3 - q1), side='right')
+        stats.append({
+            'label': str(label),
+            'q1': q1,
+            'med': med,
+            'q3': q3,
+            'whislo': values[low],
+            'whishi': values[high - 1],
+            'fliers': np.concatenate([values[:low], values[high:]]),
+        })
+    return stats
+
+
+def _correlation_moments(data, cell, n_cells):
+    """Per-cell pairwise-complete sums behind ``DataFrame.corr`` of the numeric columns.
+
+    Returns the column names and an array of shape (4, cells, k, k) with,
+    for every pair (i, j) over the rows where both are present, the number
+    of rows, the sum of column i, the sum of its squares and the sum of
+    the products. Columns are centered first, which keeps the sums small.
+    """
+    numeric = list(data.select_dtypes(include='number').columns)
+    values = data[numeric].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    values = values - np.nansum(values, axis=0) / np.maximum(present.sum(axis=0), 1)
+    k = len(numeric)
+    moments = np.zeros((4, n_cells, k, k))
+    for i in range(k):
+        for j in range(i, k):
+            both = present[:, i] & present[:, j]
+            x = np.where(both, values[:, i], 0.0)
+            y = np.where(both, values[:, j], 0.0)
+            moments[0, :, i, j] = moments[0, :, j, i] = np.bincount(cell, both, n_cells)
+            moments[1, :, i, j] = np.bincount(cell, x, n_cells)
+            moments[1, :, j, i] = np.bincount(cell, y, n_cells)
+            moments[2, :, i, j] = np.bincount(cell, x * x, n_cells)
+            moments[2, :, j, i] = np.bincount(cell, y * y, n_cells)
+            moments[3, :, i, j] = moments[3, :, j, i] = np.bincount(cell, x * y, n_cells)
+    return numeric, moments
+
+
+def _correlation(numeric, moments):
+    """Pearson correlations from summed pairwise moments, NaN where undefined."""
+    n, sums, squares, products = moments
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = products - sums * sums.T / n
+        variance = (squares - sums ** 2 / n) * (squares.T - sums.T ** 2 / n)
+        corr = covariance / np.sqrt(variance)
+    corr[(n < 2) | ~(variance > 0)] = np.nan
+    return pd.DataFrame(corr, index=numeric, columns=numeric)
+
+
+class FilterIndex:
+    """Per-cell aggregates of one dataset and the cell ids behind every filter value."""
+
+    def __init__(self, data):
+        self.rows = len(data)
+        self.categories = {}
+        self.ranges = {}
+        self._aggregates = OrderedDict()
+        self._aggregates_lock = threading.Lock()
+
+        dims = [c for c in CATEGORY_COLUMNS + RANGE_COLUMNS if c in data.columns]
+        cell, self.cells = _cell_ids(data, dims)
+        n_cells = len(self.cells)
+        salary = data['SALARY'].to_numpy(dtype=float)
+        known = ~np.isnan(salary)
+
+        # Mergeable per-cell statistics; every count and mean is a sum of them
+        per_cell = pd.DataFrame({'SALARY': salary, 'row': np.arange(self.rows)}).groupby(cell)
+        self.cells['size'] = np.bincount(cell, minlength=n_cells)
+        self.cells['count'] = np.bincount(cell[known], minlength=n_cells)
+        self.cells['sum'] = np.bincount(cell, np.where(known, salary, 0.0), n_cells)
+        self.cells['max'] = per_cell['SALARY'].max().to_numpy()
+        # Where each cell first appears, for the data-order animation frames
+        self.cells['first'] = per_cell['row'].min().to_numpy()
+        self.missing = data.isnull().groupby(cell).sum()
+        self.numeric, self.moments = _correlation_moments(data, cell, n_cells)
+
+        self.histogram_edges = np.histogram_bin_edges(salary[known], bins=FINE_HISTOGRAM_BINS)
+        bins = np.clip(np.searchsorted(self.histogram_edges, salary[known], side='right') - 1,
+                       0, FINE_HISTOGRAM_BINS - 1)
+        self.histograms = np.bincount(cell[known] * FINE_HISTOGRAM_BINS + bins,
+                                      minlength=n_cells * FINE_HISTOGRAM_BINS).reshape(n_cells, -1)
+
+        # Each cell's highest paid rows, in data order, hold every row a top list can need
+        ranked = np.lexsort((np.arange(self.rows), -salary))
+        ranked = ranked[known[ranked]]
+        top = np.sort(ranked[pd.Series(cell[ranked]).groupby(cell[ranked]).cumcount().to_numpy() < TOP_ROWS])
+        self.top = data.take(top).reset_index(drop=True)
+        self.top_cells = cell[top]
+
+        # Rows for the quantile charts: cell id and known SALARY only, in salary order
+        order = np.argsort(salary[known], kind='stable')
+        self.row_cells = cell[known][order].astype(np.int32)
+        self.row_salary = salary[known][order]
+
+        self.codes = {}
+        for column in dims:
+            if column in CATEGORY_COLUMNS:
+                self.categories[column] = {
+                    value: np.asarray(ids) for value, ids in self.cells.groupby(column).indices.items()
+                }
+                # Small integer codes per cell, to group the rows of the quantile charts
+                codes, labels = pd.factorize(self.cells[column], sort=True)
+                self.codes[column] = (codes.astype(np.int16), np.asarray(labels, dtype=object))
+            else:
+                values = self.cells[column].to_numpy(dtype=float)
+                # NaN sorts last, so no closed range ever selects it
+                order = np.argsort(values, kind='stable')
+                self.ranges[column] = (order, values[order])
+
+    def options(self, column):
+        """The values of a categorical column, in sorted order."""
+        return sorted(self.categories.get(column, {}))
+
+    def extent(self, column):
+        """``(min, max)`` of a range column, or None when it has no values."""
+        if column not in self.ranges:
+            return None
+        sorted_values = self.ranges[column][1]
+        known = sorted_values[~np.isnan(sorted_values)]
+        return (float(known[0]), float(known[-1])) if len(known) else None
+
+    def _candidates(self, filters):
+        """Sorted cell id arrays, one per active filter."""
+        arrays = []
+        for column, selected in filters.items():
+            if column in self.categories:
+                groups = self.categories[column]
+                if not selected or set(selected) >= set(groups):
+                    continue
+                parts = [groups[value] for value in selected if value in groups]
+                # The groups are disjoint, so their union only needs sorting
+                arrays.append(np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp))
+            elif column in self.ranges:
+                if selected is None:
+                    continue
+                low, high = selected
+                order, sorted_values = self.ranges[column]
+                if (low, high) == self.extent(column):
+                    continue
+                start = np.searchsorted(sorted_values, low, side='left')
+                stop = np.searchsorted(sorted_values, high, side='right')
+                arrays.append(np.sort(order[start:stop]))
+            else:
+                raise KeyError(f'No index for column {column!r}')
+        return arrays
+
+    def positions(self, filters):
+        """Sorted ids of the cells matching every filter, or None for all cells.
+
+        ``filters`` maps a categorical column to the values to keep (empty
+        keeps all) and a range column to an inclusive ``(low, high)`` pair.
+        """
+        arrays = sorted(self._candidates(filters), key=len)
+        if not arrays:
+            return None
+        result = arrays[0]
+        for positions in arrays[1:]:
+            if not len(result):
+                break
+            result = _intersect(result, positions)
+        return result
+
+    def aggregates(self, filters):
+        """Explore page aggregates of the rows matching ``filters``, or None for all rows.
+
+        A combination that matches no rows gives ``{'rows': 0}``; there is
+        nothing to chart.
+        """
+        with stage('filters.resolve'):
+            positions = self.positions(filters)
+        if positions is None:
+            return None
+        if not self.cells['size'].to_numpy()[positions].sum():
+            return {'rows': 0}
+        key = filter_key(filters)
+        with self._aggregates_lock:
+            if key in self._aggregates:
+                self._aggregates.move_to_end(key)
+                count('filters.cache_hit')
+                return self._aggregates[key]
+        selected = np.zeros(len(self.cells), dtype=bool)
+        selected[positions] = True
+        with stage('filters.aggregate'):
+            agg = self._roll_up(selected)
+        with stage('filters.quantiles'):
+            agg.update(self._row_aggregates(selected))
+        with self._aggregates_lock:
+            self._aggregates[key] = agg
+            while len(self._aggregates) > AGGREGATE_CACHE_SIZE:
+                self._aggregates.popitem(last=False)
+        return agg
+
+    def _histogram(self, selected):
+        """The selection's salary histogram: fine bins merged into at most HISTOGRAM_BINS."""
+        counts = self.histograms[selected].sum(axis=0)
+        used = np.flatnonzero(counts)
+        if not len(used):
+            return np.histogram(np.empty(0), bins=HISTOGRAM_BINS)
+        first, span = used[0], used[-1] - used[0] + 1
+        width = (span + HISTOGRAM_BINS - 1) // HISTOGRAM_BINS
+        bins = (span + width - 1) // width
+        # Move the start back where the last coarse bin would run past the fine ones
+        first = min(first, FINE_HISTOGRAM_BINS - bins * width)
+        merged = counts[first:first + bins * width].reshape(bins, width).sum(axis=1)
+        return merged, self.histogram_edges[first:first + bins * width + 1:width]
+
+    def _roll_up(self, selected):
+        """Every aggregate a sum over cells gives, matching ``compute_aggregates``."""
+        cells = self.cells[selected]
+        columns = set(cells.columns)
+        agg = {'rows': int(cells['size'].sum())}
+
+        def roll_up(*levels):
+            return cells.groupby(list(levels), observed=True)[['sum', 'count', 'size']].sum()
+
+        if 'DESIGNATION' in columns:
+            agg['designation_count'] = roll_up('DESIGNATION')['size'].sort_values(ascending=False)
+        if 'UNIT' in columns:
+            agg['unit_count'] = roll_up('UNIT')['size'].sort_values(ascending=False)
+            agg['salary_by_unit'] = _mean(roll_up('UNIT')).sort_values(ascending=False)
+
+        if {'UNIT', 'SEX', 'DESIGNATION'} <= columns:
+            # Units and genders in the order they first appear in the matching rows
+            by_group = _mean(roll_up('UNIT', 'SEX', 'DESIGNATION')).rename('SALARY')
+            pairs = set(by_group.index.droplevel('DESIGNATION'))
+            frames = {}
+            for unit in cells.groupby('UNIT')['first'].min().sort_values().index:
+                for sex in cells.groupby('SEX')['first'].min().sort_values().index:
+                    if (unit, sex) in pairs:
+                        group = by_group.loc[(unit, sex)].reset_index()
+                        frames[(unit, sex)] = group.sort_values('SALARY', ascending=False)
+            agg['designation_salary_frames'] = frames
+        elif 'DESIGNATION' in columns:
+            anim_col = 'UNIT' if 'UNIT' in columns else 'SEX' if 'SEX' in columns else 'DESIGNATION'
+            group = _mean(roll_up(anim_col, 'DESIGNATION')).rename('SALARY').reset_index()
+            agg['designation_salary_animation'] = (
+                anim_col, group.sort_values([anim_col, 'SALARY'], ascending=[True, False]))
+
+        if {'UNIT', 'SEX'} <= columns:
+            unit_sex = roll_up('UNIT', 'SEX')
+            agg['gender_by_unit'] = unit_sex['size'].unstack(fill_value=0)
+            paygap = _mean(unit_sex).unstack()
+            paygap.columns = paygap.columns.astype(object)
+            paygap['Gap'] = paygap.max(axis=1) - paygap.min(axis=1)
+            agg['paygap'] = paygap.sort_values('Gap', ascending=False)
+
+        agg['categories'] = {c: sorted(cells[c].dropna().unique()) for c in CATEGORY_COLUMNS if c in columns}
+        agg['extents'] = {}
+        for c in RANGE_COLUMNS:
+            if c in columns and cells[c].notna().any():
+                agg['extents'][c] = (float(cells[c].min()), float(cells[c].max()))
+
+        agg['salary_max'] = cells['max'].max() if cells['count'].sum() else 0.0
+        agg['salary_histogram'] = self._histogram(selected)
+        missing = self.missing[selected].sum()
+        agg['missing'] = missing[missing > 0]
+        agg['corr'] = _correlation(self.numeric, self.moments[:, selected].sum(axis=1))
+        agg['top10'] = self.top[selected[self.top_cells]].nlargest(TOP_ROWS, 'SALARY').reset_index(drop=True)
+
+        if 'PAST EXP' in columns:
+            buckets = pd.cut(cells['PAST EXP'], bins=EXP_BINS, labels=EXP_LABELS, right=False)
+            by_bucket = cells[['sum', 'count', 'size']].groupby(buckets, observed=False).sum()
+            agg['salary_by_exp_bucket'] = _mean(by_bucket).rename('SALARY').rename_axis('EXP_BUCKET')
+            agg['count_by_exp_bucket'] = by_bucket['size'].rename('count').sort_index()
+            if 'UNIT' in columns:
+                agg['salary_by_exp_unit'] = _mean(roll_up('PAST EXP', 'UNIT')).rename('SALARY').reset_index()
+        return agg
+
+    def _row_aggregates(self, selected):
+        """The box plots, medians and scatter sample, from the matching rows' salaries."""
+        rows = selected[self.row_cells]
+        cells = self.row_cells[rows]
+        salary = self.row_salary[rows]
+
+        agg = {}
+        for column, key in (('DESIGNATION', 'box_designation'), ('UNIT', 'box_unit'), ('SEX', 'box_sex')):
+            if column in self.codes:
+                codes, labels = self.codes[column]
+                agg[key] = _box_stats_by_code(codes[cells], labels, salary)
+        if 'box_designation' in agg:
+            medians = {stats['label']: stats['med'] for stats in agg['box_designation']}
+            agg['median_salary_by_designation'] = (
+                pd.Series(medians, name='SALARY').rename_axis('DESIGNATION').sort_values(ascending=False))
+        if 'PAST EXP' in self.ranges:
+            # A seeded uniform sample of the matching rows
+            picked = np.sort(np.random.default_rng(0).choice(len(cells), min(len(cells), SCATTER_SAMPLE), replace=False))
+            sample = cells[picked]
+            scatter = {'PAST EXP': self.cells['PAST EXP'].to_numpy()[sample], 'SALARY': salary[picked]}
+            if 'DESIGNATION' in self.codes:
+                scatter['DESIGNATION'] = self.cells['DESIGNATION'].to_numpy()[sample]
+            agg['exp_scatter'] = pd.DataFrame(scatter)
+        return agg
+
+def load_index(path=None):
+    """Return the ``FilterIndex`` for ``path``, building it at most once per file version.
+
+    ``path`` defaults to the Parquet dataset when it is current, else the CSV.
+    """
+    path = os.path.abspath(dataset_path() if path is None else path)
+    version = dataset_version(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with stage('filters.read'):
+            data = read_dataset(path)
+        with stage('filters.build'):
+            index = FilterIndex(data)
+        _cache[path] = (version, index)
+        return index
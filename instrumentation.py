@@ -0,0 +1,201 @@
+"""Opt-in timing and profiling of prediction, training and page rendering.
+
+Set ``SALARY_INSTRUMENT=1`` (or call ``enable()``) to record how long each
+named stage takes. Stages feed per-name latency histograms, and ``count``
+feeds plain counters. Both can be exported as Prometheus text or JSON,
+or written to ``SALARY_INSTRUMENT_DUMP`` (a ``.prom`` or ``.json`` path)
+at the end of every page rerun. While disabled, ``stage`` returns a
+shared no-op context manager, so instrumented code pays one call.
+
+``SALARY_PROFILE=path.prof`` additionally captures a cProfile of the
+first page rerun (or the training run) for offline analysis with
+``python -m pstats path.prof`` or snakeviz.
+"""
+import bisect
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds, from sub-millisecond lookups to slow training stages
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.environ.get('SALARY_INSTRUMENT', '') not in ('', '0')
+_dump_path = os.environ.get('SALARY_INSTRUMENT_DUMP')
+_profile_path = os.environ.get('SALARY_PROFILE')
+_NULL = contextlib.nullcontext()
+
+_lock = threading.Lock()
+# Serializes dump(): concurrent reruns would otherwise share one temp file
+_dump_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_profiled = False
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, a running sum and a maximum."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        """Prometheus-style cumulative counts keyed by upper bound."""
+        total = 0
+        result = {}
+        for bound, n in zip(BUCKETS + (float('inf'),), self.buckets):
+            total += n
+            result['+Inf' if bound == float('inf') else repr(bound)] = total
+        return result
+
+
+def enable(flag=True):
+    """Turn stage timing on or off for this process."""
+    global _enabled
+    _enabled = flag
+
+
+def enabled():
+    return _enabled
+
+
+def observe(name, seconds):
+    """Record one duration for stage ``name``."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name, n=1):
+    """Add ``n`` to counter ``name`` when instrumentation is enabled."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name):
+    """Context manager timing a block as stage ``name``; a no-op while disabled."""
+    return _Stage(name) if _enabled else _NULL
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def to_json():
+    """All histograms and counters as a JSON-serializable dict."""
+    with _lock:
+        stages = {
+            name: {
+                'count': h.count,
+                'sum_s': h.sum,
+                'mean_s': h.sum / h.count if h.count else 0.0,
+                'max_s': h.max,
+                'buckets': h.cumulative(),
+            }
+            for name, h in sorted(_histograms.items())
+        }
+        return {'stages': stages, 'counters': dict(sorted(_counters.items()))}
+
+
+def to_prometheus():
+    """All histograms and counters in the Prometheus text exposition format."""
+    snapshot = to_json()
+    lines = ['# HELP salary_stage_seconds Time spent in each instrumented stage.',
+             '# TYPE salary_stage_seconds histogram']
+    for name, s in snapshot['stages'].items():
+        for bound, n in s['buckets'].items():
+            lines.append(f'salary_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {n}')
+        lines.append(f'salary_stage_seconds_sum{{stage="{name}"}} {s["sum_s"]!r}')
+        lines.append(f'salary_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+    lines += ['# HELP salary_events_total Instrumented event counters.', '# TYPE salary_events_total counter']
+    for name, n in snapshot['counters'].items():
+        lines.append(f'salary_events_total{{name="{name}"}} {n}')
+    return '\n'.join(lines) + '\n'
+
+
+def dump(path):
+    """Write the metrics to ``path``, as Prometheus text for ``.prom`` and JSON otherwise."""
+    with _dump_lock:
+        # Snapshot inside the lock, so a later dump never loses to an older one
+        text = to_prometheus() if path.endswith('.prom') else json.dumps(to_json(), indent=2)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+
+class _Run:
+    """Bookkeeping for one page rerun or training run."""
+
+    def __init__(self, name, profiler, profile_path):
+        self.name = name
+        self.profiler = profiler
+        self.profile_path = profile_path
+        self.start = time.perf_counter()
+
+
+def begin_run(name, profile_path=None):
+    """Start timing a whole page rerun or training run named ``name``.
+
+    The first run in the process is profiled when ``profile_path`` or
+    ``SALARY_PROFILE`` is set. Returns a handle for ``end_run``, or None
+    while neither timing nor profiling is enabled.
+    """
+    global _profiled
+    profile_path = profile_path or _profile_path
+    profiler = None
+    with _lock:
+        if profile_path and not _profiled:
+            _profiled = True
+            profiler = cProfile.Profile()
+    if not _enabled and profiler is None:
+        return None
+    run = _Run(name, profiler, profile_path)
+    if profiler is not None:
+        profiler.enable()
+    return run
+
+
+def end_run(run, dump_path=None):
+    """Finish a run: record its total time, save the profile and dump the metrics."""
+    if run is None:
+        return
+    if run.profiler is not None:
+        run.profiler.disable()
+        run.profiler.dump_stats(run.profile_path)
+    if _enabled:
+        observe(f'{run.name}.total', time.perf_counter() - run.start)
+        path = dump_path or _dump_path
+        if path:
+            dump(path)
@@ -0,0 +1,137 @@
+"""Sufficient statistics for fitting the linear salary model in chunks.
+
+``LeastSquaresStats`` keeps the row count, the column means and the
+centered cross-product matrix of ``[X, y]``. Chunks are merged with the
+pairwise update of Chan et al., so the statistics never hold more than
+one chunk of rows and stay accurate when means are large. The same
+update run backwards removes rows again. Solving them gives the same
+minimum-norm solution ``LinearRegression`` finds on the full matrix.
+
+Kept for the raw encoded features, the means and the diagonal of the
+cross products are also the moments a StandardScaler is fitted from, and
+``standardized`` maps the statistics into any scaler's feature space.
+"""
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LinearRegression
+
+# Singular values below this fraction of the largest are treated as zero.
+# Each one-hot block sums to the intercept column, so the cross-product
+# matrix is singular; its null directions come out of the accumulation as
+# round-off just above lstsq's default machine-precision cutoff.
+RCOND = 1e-10
+
+
+class LeastSquaresStats:
+    """Running count, means and centered cross products of ``[X, y]``."""
+
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.count = 0
+        self.mean = np.zeros(n_features + 1)
+        self.comoment = np.zeros((n_features + 1, n_features + 1))
+
+    @classmethod
+    def from_chunk(cls, X, y):
+        """Statistics of one chunk; ``X`` is (rows, n_features), dense or sparse.
+
+        A sparse ``X`` stays sparse: its cross products are taken before
+        centering and corrected by the chunk mean.
+        """
+        y = np.asarray(y, dtype=float).reshape(-1, 1)
+        if sp.issparse(X):
+            Z = sp.hstack([X, y], format='csr', dtype=float)
+            values = Z.data
+        else:
+            Z = np.hstack([np.asarray(X, dtype=float), y])
+            values = Z
+        if np.isnan(values).any():
+            raise ValueError('Input contains NaN')
+
+        stats = cls(Z.shape[1] - 1)
+        stats.count = Z.shape[0]
+        if stats.count == 0:
+            return stats
+        stats.mean = np.asarray(Z.mean(axis=0)).ravel()
+        if sp.issparse(Z):
+            stats.comoment = (Z.T @ Z).toarray() - stats.count * np.outer(stats.mean, stats.mean)
+        else:
+            centered = Z - stats.mean
+            stats.comoment = centered.T @ centered
+        return stats
+
+    def _check(self, other):
+        if other.n_features != self.n_features:
+            raise ValueError(f'Expected {self.n_features} features, got {other.n_features}')
+
+    def merge(self, other):
+        """Add the rows summarized by ``other``."""
+        self._check(other)
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment += other.comoment + np.outer(delta, delta) * (self.count * other.count / total)
+        self.mean += delta * (other.count / total)
+        self.count = total
+        return self
+
+    def subtract(self, other):
+        """Remove the rows summarized by ``other``, which must have been added before."""
+        self._check(other)
+        if other.count == 0:
+            return self
+        if other.count > self.count:
+            raise ValueError(f'Cannot remove {other.count} rows from statistics of {self.count}')
+        remaining = self.count - other.count
+        if remaining == 0:
+            self.__init__(self.n_features)
+            return self
+        mean = (self.count * self.mean - other.count * other.mean) / remaining
+        delta = other.mean - mean
+        self.comoment -= other.comoment + np.outer(delta, delta) * (remaining * other.count / self.count)
+        self.mean = mean
+        self.count = remaining
+        return self
+
+    def update(self, X, y):
+        """Add a chunk of rows; ``X`` is (rows, n_features) and ``y`` has one value per row."""
+        return self.merge(self.from_chunk(X, y))
+
+    def remove(self, X, y):
+        """Remove a chunk of rows that was added before."""
+        return self.subtract(self.from_chunk(X, y))
+
+    def standardized(self, mean, scale):
+        """Statistics of ``[(X - mean) / scale, y]`` for the same rows."""
+        factor = np.append(1.0 / np.asarray(scale, dtype=float), 1.0)
+        shift = np.append(np.asarray(mean, dtype=float), 0.0)
+        stats = LeastSquaresStats(self.n_features)
+        stats.count = self.count
+        stats.mean = (self.mean - shift) * factor
+        stats.comoment = self.comoment * np.outer(factor, factor)
+        return stats
+
+    def _solve(self):
+        if self.count == 0:
+            raise ValueError('No rows have been added')
+        p = self.n_features
+        # Minimum-norm solution, matching lstsq on the centered design matrix
+        coef, _, rank, _ = np.linalg.lstsq(self.comoment[:p, :p], self.comoment[:p, p], rcond=RCOND)
+        intercept = self.mean[p] - self.mean[:p] @ coef
+        return coef, intercept, rank
+
+    def solve(self):
+        """Return ``(coef, intercept)`` of the least-squares fit with intercept."""
+        coef, intercept, _ = self._solve()
+        return coef, intercept
+
+    def to_model(self):
+        """Build a fitted ``LinearRegression`` from the statistics."""
+        coef, intercept, rank = self._solve()
+        model = LinearRegression()
+        model.coef_ = coef
+        model.intercept_ = float(intercept)
+        model.n_features_in_ = self.n_features
+        model.rank_ = int(rank)
+        return model
@@ -0,0 +1,110 @@
+"""Cached, non-blocking loading of the Lottie animations shown on the pages.
+
+An animation is looked up in memory, then in the on-disk cache under
+``assets/cache``. On a miss the bundled ``assets/salary_pulse.json`` is
+returned straight away and the remote file is fetched once, with a timeout,
+on a background thread; the next rerun picks it up from disk. A failed
+fetch is not retried for the rest of the process, so an offline deployment
+never waits on the network.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from instrumentation import count, stage
+
+LOTTIE_URL = 'https://assets2.lottiefiles.com/packages/lf20_ktwnwv5m.json'
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+CACHE_DIR = os.path.join(ASSET_DIR, 'cache')
+FALLBACK_PATH = os.path.join(ASSET_DIR, 'salary_pulse.json')
+FETCH_TIMEOUT = 3.0
+
+_lock = threading.Lock()
+_cache = {}
+_pending = set()
+_failed = set()
+
+
+def _cache_path(url):
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f'{digest}.json')
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def fetch_lottie(url, timeout=FETCH_TIMEOUT):
+    """Download an animation into the disk cache and return it, or None on failure."""
+    import requests
+
+    try:
+        with stage('lottie.fetch'):
+            r = requests.get(url, timeout=timeout)
+        if r.status_code != 200:
+            return None
+        animation = r.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+    # Write atomically so a concurrent reader never sees a partial file;
+    # a read-only deployment still gets the animation for this process
+    path = _cache_path(url)
+    tmp_path = f'{path}.tmp'
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(animation, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return animation
+
+
+def _fetch_in_background(url, timeout):
+    def run():
+        animation = fetch_lottie(url, timeout)
+        with _lock:
+            _pending.discard(url)
+            if animation is None:
+                _failed.add(url)
+            else:
+                _cache[url] = animation
+
+    with _lock:
+        if url in _pending or url in _failed:
+            return
+        _pending.add(url)
+    threading.Thread(target=run, name='lottie-fetch', daemon=True).start()
+
+
+def load_lottie(url=LOTTIE_URL, timeout=FETCH_TIMEOUT, fallback=FALLBACK_PATH):
+    """Return the animation JSON for ``url`` without blocking on the network.
+
+    Returns the bundled ``fallback`` animation while the remote file is not
+    cached yet, and None only if the fallback is missing too.
+    """
+    animation = _cache.get(url)
+    if animation is not None:
+        return animation
+
+    animation = _read_json(_cache_path(url))
+    if animation is not None:
+        _cache[url] = animation
+        return animation
+
+    _fetch_in_background(url, timeout)
+    count('lottie.fallback')
+    if fallback is None:
+        return None
+    animation = _cache.get(fallback)
+    if animation is None:
+        animation = _read_json(fallback)
+        if animation is not None:
+            _cache[fallback] = animation
+    return animation
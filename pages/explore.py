@@ -1,324 +1,408 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import requests
-from streamlit_lottie import st_lottie
-import plotly.graph_objects as go
+
+import figure_cache
+import instrumentation
+from aggregates import dataset_version, load_aggregates
+from dataset import dataset_path
+from filter_index import filter_key, load_index
+from lottie_assets import LOTTIE_URL, load_lottie
 
 st.markdown("""
 # 📊 Explore Salary Data
 Dive into the salary dataset with interactive charts. Use the sidebar to switch pages.
 """)
 
-# --- Lottie Animation Function ---
-def load_lottieurl(url):
-    import requests
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-# --- Lottie Animation URL (e.g., data analysis animation) ---
-lottie_url = "https://assets2.lottiefiles.com/packages/lf20_ktwnwv5m.json"
-lottie_json = load_lottieurl(lottie_url)
-st_lottie(lottie_json, height=100, key="explore_anim")
-
-# --- Load Data ---
-data = pd.read_csv('salary prediction.csv')  # Corrected path to match actual file
-
-# --- Layout: Use columns for side-by-side charts ---
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("🟠 Employee Count by Designation (Pie Chart)")
-    des_count = data['DESIGNATION'].value_counts()
-    fig1 = px.pie(names=des_count.index, values=des_count.values, title='', hole=0.3)
-    # --- Example for all Plotly pie charts ---
-    fig1.update_layout(width=800, height=450)  # Employee Count by Designation (Pie Chart) larger size
-    st.plotly_chart(fig1)
-
-with col2:
-    st.subheader("🔵 Employee Count by Unit (Pie Chart)")
-    unit_count = data['UNIT'].value_counts()
-    fig2 = px.pie(names=unit_count.index, values=unit_count.values, title='', hole=0.3)
-    # --- Example for all Plotly charts ---
-    fig2.update_layout(width=800, height=450)  # Employee Count by Unit (Pie Chart) larger size
-    st.plotly_chart(fig2)
-
-# --- Enhanced Animated Bar Chart: Salary by Designation ---
-# Animate over both UNIT and SEX if both are present, else fallback
-
-if 'UNIT' in data.columns and 'SEX' in data.columns:
-    # Prepare data for animation over UNIT and SEX
-    frames = []
-    units = data['UNIT'].unique()
-    sexes = data['SEX'].unique()
-    for unit in units:
-        for sex in sexes:
-            df = data[(data['UNIT'] == unit) & (data['SEX'] == sex)]
-            if not df.empty:
-                group = df.groupby('DESIGNATION')['SALARY'].mean().reset_index()
-                group = group.sort_values('SALARY', ascending=False)
-                frames.append(go.Frame(
-                    data=[go.Bar(
-                        x=group['DESIGNATION'],
-                        y=group['SALARY'],
-                        marker_color=group['SALARY'],
-                        text=group['SALARY'].round(0),
-                        textposition='auto',
-                        marker=dict(color=group['SALARY'], colorscale='Viridis'),
-                    )],
-                    name=f"{unit}-{sex}",
-                    layout=go.Layout(title_text=f"Unit: {unit} | Gender: {sex}")
-                ))
-    # Initial frame
-    first = frames[0].data[0]
-    fig3 = go.Figure(
-        data=[first],
-        layout=go.Layout(
-            updatemenus=[{
-                'type': 'buttons',
-                'showactive': False,
-                'buttons': [
-                    {'label': 'Play', 'method': 'animate', 'args': [None, {'frame': {'duration': 900, 'redraw': True}, 'fromcurrent': True}]},
-                    {'label': 'Pause', 'method': 'animate', 'args': [[None], {'frame': {'duration': 0, 'redraw': False}, 'mode': 'immediate', 'transition': {'duration': 0}}]}
-                ]
-            }],
-            sliders=[{
-                'steps': [
-                    {'args': [[f.name], {'frame': {'duration': 900, 'redraw': True}, 'mode': 'immediate'}], 'label': f.name, 'method': 'animate'}
-                    for f in frames
-                ],
-                'transition': {'duration': 400},
-                'x': 0.1,
-                'len': 0.9
-            }],
-            xaxis_title='Designation',
-            yaxis_title='Average Salary',
-            width=800,
-            height=450,
-            margin=dict(l=10, r=10, t=60, b=10),
-        ),
-        frames=frames
-    )
-else:
+
+# --- Chart helpers; the page body at the end uses them inside its timed run ---
+
+def render_pyplot(name, build):
+    """Show a matplotlib chart, rasterized once per chart key and then closed."""
+    with instrumentation.stage('explore.render.matplotlib'):
+        png = figure_cache.get((chart_key, name), lambda: figure_cache.to_png(build()))
+        st.image(png)
+
+
+def render_plotly(name, build):
+    """Show a Plotly chart, built once per chart key."""
+    with instrumentation.stage('explore.render.plotly'):
+        st.plotly_chart(figure_cache.get((chart_key, name), build))
+
+
+PLAY_PAUSE = [{
+    'type': 'buttons',
+    'showactive': False,
+    'buttons': [
+        {'label': 'Play', 'method': 'animate', 'args': [None, {'frame': {'duration': 900, 'redraw': True}, 'fromcurrent': True}]},
+        {'label': 'Pause', 'method': 'animate', 'args': [[None], {'frame': {'duration': 0, 'redraw': False}, 'mode': 'immediate', 'transition': {'duration': 0}}]}
+    ]
+}]
+
+
+# --- Chart builders (only called for the open section, on a cache miss) ---
+# Plotting libraries are imported by the first builder that needs them
+
+
+def designation_pie():
+    import plotly.express as px
+
+    des_count = agg['designation_count']
+    fig = px.pie(names=des_count.index, values=des_count.values, title='', hole=0.3)
+    fig.update_layout(width=800, height=450)  # Employee Count by Designation (Pie Chart) larger size
+    return fig
+
+
+def unit_pie():
+    import plotly.express as px
+
+    unit_count = agg['unit_count']
+    fig = px.pie(names=unit_count.index, values=unit_count.values, title='', hole=0.3)
+    fig.update_layout(width=800, height=450)  # Employee Count by Unit (Pie Chart) larger size
+    return fig
+
+
+def designation_salary_animation():
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    # Animate over both UNIT and SEX if both are present, else fallback
+    if agg.get('designation_salary_frames'):
+        frames = []
+        for (unit, sex), group in agg['designation_salary_frames'].items():
+            frames.append(go.Frame(
+                data=[go.Bar(
+                    x=group['DESIGNATION'],
+                    y=group['SALARY'],
+                    marker_color=group['SALARY'],
+                    text=group['SALARY'].round(0),
+                    textposition='auto',
+                    marker=dict(color=group['SALARY'], colorscale='Viridis'),
+                )],
+                name=f"{unit}-{sex}",
+                layout=go.Layout(title_text=f"Unit: {unit} | Gender: {sex}")
+            ))
+        # Initial frame
+        return go.Figure(
+            data=[frames[0].data[0]],
+            layout=go.Layout(
+                updatemenus=PLAY_PAUSE,
+                sliders=[{
+                    'steps': [
+                        {'args': [[f.name], {'frame': {'duration': 900, 'redraw': True}, 'mode': 'immediate'}], 'label': f.name, 'method': 'animate'}
+                        for f in frames
+                    ],
+                    'transition': {'duration': 400},
+                    'x': 0.1,
+                    'len': 0.9
+                }],
+                xaxis_title='Designation',
+                yaxis_title='Average Salary',
+                width=800,
+                height=450,
+                margin=dict(l=10, r=10, t=60, b=10),
+            ),
+            frames=frames
+        )
     # Fallback to previous logic (animate over UNIT or SEX or DESIGNATION)
-    if 'UNIT' in data.columns:
-        anim_col = 'UNIT'
-    elif 'SEX' in data.columns:
-        anim_col = 'SEX'
-    else:
-        anim_col = 'DESIGNATION'
-    group = data.groupby([anim_col, 'DESIGNATION'])['SALARY'].mean().reset_index()
-    group = group.sort_values([anim_col, 'SALARY'], ascending=[True, False])
-    fig3 = px.bar(
+    anim_col, group = agg['designation_salary_animation']
+    fig = px.bar(
         group,
         x='DESIGNATION',
         y='SALARY',
         color='SALARY',
         animation_frame=anim_col,
-        range_y=[0, data['SALARY'].max()*1.1],
+        range_y=[0, agg['salary_max']*1.1],
         width=800,
         height=450,
         color_continuous_scale='Viridis',
         text='SALARY',
         title=f'Animated Salary by Designation (by {anim_col.title()})'
     )
-    fig3.update_traces(texttemplate='%{text:.0f}', textposition='outside')
-    fig3.update_layout(
-        updatemenus=[{
-            'type': 'buttons',
-            'showactive': False,
-            'buttons': [
-                {'label': 'Play', 'method': 'animate', 'args': [None, {'frame': {'duration': 900, 'redraw': True}, 'fromcurrent': True}]},
-                {'label': 'Pause', 'method': 'animate', 'args': [[None], {'frame': {'duration': 0, 'redraw': False}, 'mode': 'immediate', 'transition': {'duration': 0}}]}
-            ]
-        }],
+    fig.update_traces(texttemplate='%{text:.0f}', textposition='outside')
+    fig.update_layout(
+        updatemenus=PLAY_PAUSE,
         margin=dict(l=10, r=10, t=60, b=10),
         xaxis_title='Designation',
         yaxis_title='Average Salary',
         coloraxis_colorbar=dict(title='Salary'),
     )
+    return fig
+
+
+def salary_histogram():
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(5, 2.8))
+    counts, edges = agg['salary_histogram']
+    ax.hist(edges[:-1], bins=edges, weights=counts, color='#6C47FF', edgecolor='white', alpha=0.8)
+    ax.set_xlabel('Salary')
+    ax.set_ylabel('Count')
+    ax.set_title('Salary Distribution')
+    return fig
+
 
-# --- Histogram: Salary Distribution ---
-st.subheader("🟢 Salary Distribution (Histogram)")
-fig4, ax4 = plt.subplots(figsize=(5, 2.8))
-ax4.hist(data['SALARY'], bins=20, color='#6C47FF', edgecolor='white', alpha=0.8)
-ax4.set_xlabel('Salary')
-ax4.set_ylabel('Count')
-ax4.set_title('Salary Distribution')
-st.pyplot(fig4)
-
-# --- Boxplot: Salary by Gender ---
-st.subheader("🟤 Salary by Gender (Boxplot)")
-fig5, ax5 = plt.subplots(figsize=(5, 2.8))
-data.boxplot(column='SALARY', by='SEX', ax=ax5, grid=False, patch_artist=True, boxprops=dict(facecolor='#FFB300', color='#6C47FF'))
-ax5.set_title('Salary by Gender')
-ax5.set_xlabel('Gender')
-ax5.set_ylabel('Salary')
-plt.suptitle('')
-st.pyplot(fig5)
-
-# --- Missing Values Overview ---
-st.subheader("🟡 Missing Values Overview")
-missing = data.isnull().sum()
-missing = missing[missing > 0]
-if not missing.empty:
-    st.dataframe(missing.to_frame('Missing Count').style.background_gradient(cmap='Oranges'))
-else:
-    st.success('No missing values found!')
-
-# --- Experience vs. Salary (Scatter Plot) ---
-st.subheader("🔴 Experience vs. Salary by Designation")
-if 'PAST EXP' in data.columns:
-    fig7 = px.scatter(data, x='PAST EXP', y='SALARY', color='DESIGNATION',
+def salary_boxplot(key, title, xlabel, figsize, facecolor, color):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.bxp(agg[key], patch_artist=True, boxprops=dict(facecolor=facecolor, color=color))
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Salary')
+    return fig
+
+
+def experience_scatter():
+    import plotly.express as px
+
+    fig = px.scatter(agg['exp_scatter'], x='PAST EXP', y='SALARY', color='DESIGNATION',
                      labels={'PAST EXP': 'Years of Experience', 'SALARY': 'Salary'},
                      width=400, height=250, opacity=0.7)
-    fig7.update_layout(margin=dict(l=10, r=10, t=30, b=10))
-    st.plotly_chart(fig7)
-else:
-    st.info('Experience data not available for scatter plot.')
-
-# --- Salary Distribution by Designation (Boxplot) ---
-st.subheader("🟣 Salary Distribution by Designation (Boxplot)")
-fig8, ax8 = plt.subplots(figsize=(6, 3.2))
-designations = data['DESIGNATION'].unique()
-data.boxplot(column='SALARY', by='DESIGNATION', ax=ax8, grid=False, patch_artist=True,
-             boxprops=dict(facecolor='#6C47FF', color='#FFB300'))
-ax8.set_title('Salary by Designation')
-ax8.set_xlabel('Designation')
-ax8.set_ylabel('Salary')
-plt.suptitle('')
-st.pyplot(fig8)
-
-# --- Average Salary by Experience Level (Bar) ---
-st.subheader("🟢 Average Salary by Experience Level")
-if 'PAST EXP' in data.columns:
-    bins = [0, 2, 5, 10, 20, 50]
-    labels = ['0-2', '3-5', '6-10', '11-20', '20+']
-    data['EXP_BUCKET'] = pd.cut(data['PAST EXP'], bins=bins, labels=labels, right=False)
-    exp_salary = data.groupby('EXP_BUCKET')['SALARY'].mean().reset_index()
-    fig9 = px.bar(exp_salary, x='EXP_BUCKET', y='SALARY', color='SALARY', width=400, height=250, color_continuous_scale='Viridis')
-    fig9.update_layout(margin=dict(l=10, r=10, t=30, b=10), xaxis_title='Experience (Years)', yaxis_title='Avg Salary')
-    st.plotly_chart(fig9)
-else:
-    st.info('Experience data not available for experience-level chart.')
-
-# --- Gender Ratio by Unit (Stacked Bar) ---
-st.subheader("🟤 Gender Ratio by Unit (Stacked Bar)")
-gender_unit = data.groupby(['UNIT', 'SEX']).size().unstack(fill_value=0)
-fig10 = gender_unit.plot(kind='bar', stacked=True, figsize=(6, 3.2), color=['#6C47FF', '#FFB300', '#43C59E'])
-plt.title('Gender Ratio by Unit')
-plt.xlabel('Unit')
-plt.ylabel('Count')
-st.pyplot(fig10.get_figure())
-
-# --- Add extra padding at the bottom for laptop screens ---
-st.markdown('<div style="height: 2em;"></div>', unsafe_allow_html=True)
-
-# --- All chart sizes and layout are now optimized for laptop screens --- 
-
-# --- Average Salary by Unit (Static Bar Chart) ---
-st.subheader("🟢 Average Salary by Unit")
-salary_by_unit = data.groupby('UNIT')['SALARY'].mean().sort_values(ascending=False).reset_index()
-fig_unit = px.bar(
-    salary_by_unit,
-    x='UNIT',
-    y='SALARY',
-    color='UNIT',
-    title='Average Salary by Unit',
-    width=700,
-    height=400
-)
-fig_unit.update_layout(showlegend=False, margin=dict(l=10, r=10, t=40, b=10))
-st.plotly_chart(fig_unit) 
-
-# --- Salary Distribution by Unit (Boxplot) ---
-st.subheader("🟣 Salary Distribution by Unit (Boxplot)")
-if 'UNIT' in data.columns:
-    fig_box_unit, ax_box_unit = plt.subplots(figsize=(7, 3.5))
-    data.boxplot(column='SALARY', by='UNIT', ax=ax_box_unit, grid=False, patch_artist=True,
-                 boxprops=dict(facecolor='#43C59E', color='#6C47FF'))
-    ax_box_unit.set_title('Salary by Unit')
-    ax_box_unit.set_xlabel('Unit')
-    ax_box_unit.set_ylabel('Salary')
-    plt.suptitle('')
-    st.pyplot(fig_box_unit)
-else:
-    st.info('Unit data not available for boxplot.')
-
-# --- Median Salary by Designation (Bar Chart) ---
-st.subheader("🟤 Median Salary by Designation")
-if 'DESIGNATION' in data.columns:
-    med_salary_des = data.groupby('DESIGNATION')['SALARY'].median().sort_values(ascending=False).reset_index()
-    fig_med_des = px.bar(med_salary_des, x='DESIGNATION', y='SALARY', color='SALARY',
-                        color_continuous_scale='Blues', width=700, height=350,
-                        title='Median Salary by Designation')
-    fig_med_des.update_layout(margin=dict(l=10, r=10, t=40, b=10), xaxis_title='Designation', yaxis_title='Median Salary')
-    st.plotly_chart(fig_med_des)
-else:
-    st.info('Designation data not available for median salary chart.')
-
-# --- Employee Count by Experience Bucket (Bar Chart) ---
-st.subheader("🟢 Employee Count by Experience Bucket")
-if 'PAST EXP' in data.columns:
-    bins = [0, 2, 5, 10, 20, 50]
-    labels = ['0-2', '3-5', '6-10', '11-20', '20+']
-    data['EXP_BUCKET'] = pd.cut(data['PAST EXP'], bins=bins, labels=labels, right=False)
-    exp_count = data['EXP_BUCKET'].value_counts().sort_index().reset_index()
+    fig.update_layout(margin=dict(l=10, r=10, t=30, b=10))
+    return fig
+
+
+def salary_by_experience_bucket():
+    import plotly.express as px
+
+    exp_salary = agg['salary_by_exp_bucket'].reset_index()
+    fig = px.bar(exp_salary, x='EXP_BUCKET', y='SALARY', color='SALARY', width=400, height=250, color_continuous_scale='Viridis')
+    fig.update_layout(margin=dict(l=10, r=10, t=30, b=10), xaxis_title='Experience (Years)', yaxis_title='Avg Salary')
+    return fig
+
+
+def gender_by_unit():
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6, 3.2))
+    agg['gender_by_unit'].plot(kind='bar', stacked=True, ax=ax, color=['#6C47FF', '#FFB300', '#43C59E'])
+    ax.set_title('Gender Ratio by Unit')
+    ax.set_xlabel('Unit')
+    ax.set_ylabel('Count')
+    return fig
+
+
+def salary_by_unit():
+    import plotly.express as px
+
+    data = agg['salary_by_unit'].rename('SALARY').reset_index()
+    fig = px.bar(data, x='UNIT', y='SALARY', color='UNIT', title='Average Salary by Unit', width=700, height=400)
+    fig.update_layout(showlegend=False, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+def median_salary_by_designation():
+    import plotly.express as px
+
+    med_salary_des = agg['median_salary_by_designation'].reset_index()
+    fig = px.bar(med_salary_des, x='DESIGNATION', y='SALARY', color='SALARY',
+                 color_continuous_scale='Blues', width=700, height=350,
+                 title='Median Salary by Designation')
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10), xaxis_title='Designation', yaxis_title='Median Salary')
+    return fig
+
+
+def count_by_experience_bucket():
+    import plotly.express as px
+
+    exp_count = agg['count_by_exp_bucket'].reset_index()
     exp_count.columns = ['Experience Bucket', 'Count']
-    fig_exp_count = px.bar(exp_count, x='Experience Bucket', y='Count', color='Count', width=700, height=350, color_continuous_scale='Viridis')
-    fig_exp_count.update_layout(margin=dict(l=10, r=10, t=40, b=10))
-    st.plotly_chart(fig_exp_count)
-else:
-    st.info('Experience data not available for experience bucket chart.')
-
-# --- Salary vs. Experience (Line, by Unit) ---
-st.subheader("🔵 Salary vs. Experience (Line, by Unit)")
-if 'PAST EXP' in data.columns and 'UNIT' in data.columns:
-    exp_unit = data.groupby(['PAST EXP', 'UNIT'])['SALARY'].mean().reset_index()
-    fig_exp_unit = px.line(exp_unit, x='PAST EXP', y='SALARY', color='UNIT', width=700, height=350,
-                          labels={'PAST EXP': 'Years of Experience', 'SALARY': 'Avg Salary'},
-                          title='Average Salary vs. Experience by Unit')
-    fig_exp_unit.update_layout(margin=dict(l=10, r=10, t=40, b=10))
-    st.plotly_chart(fig_exp_unit)
-else:
-    st.info('Experience or unit data not available for salary vs. experience chart.')
-
-# --- Gender Pay Gap by Unit (Bar) ---
-st.subheader("🟠 Gender Pay Gap by Unit")
-if 'UNIT' in data.columns and 'SEX' in data.columns:
-    paygap = data.groupby(['UNIT', 'SEX'])['SALARY'].mean().unstack()
-    paygap['Gap'] = paygap.max(axis=1) - paygap.min(axis=1)
-    paygap = paygap.sort_values('Gap', ascending=False)
-    fig_paygap = px.bar(paygap.reset_index(), x='UNIT', y=paygap.columns[:-1], barmode='group',
-                       width=700, height=350, title='Average Salary by Gender and Unit')
-    fig_paygap.update_layout(margin=dict(l=10, r=10, t=40, b=10), yaxis_title='Avg Salary')
-    st.plotly_chart(fig_paygap)
-else:
-    st.info('Unit or gender data not available for pay gap chart.')
-
-# --- Top 10 Highest Paid Employees (Table) ---
-st.subheader("🔴 Top 10 Highest Paid Employees")
-top10 = data.sort_values('SALARY', ascending=False).head(10)
-st.dataframe(top10.reset_index(drop=True))
-
-# --- Correlation Heatmap ---
-st.subheader("🟡 Correlation Heatmap")
-numeric_cols = data.select_dtypes(include='number')
-if numeric_cols.shape[1] > 1:
-    corr = numeric_cols.corr()
-    fig_corr, ax_corr = plt.subplots(figsize=(6, 4))
-    im = ax_corr.imshow(corr, cmap='coolwarm', interpolation='nearest')
-    ax_corr.set_xticks(range(len(corr.columns)))
-    ax_corr.set_yticks(range(len(corr.columns)))
-    ax_corr.set_xticklabels(corr.columns, rotation=45, ha='right')
-    ax_corr.set_yticklabels(corr.columns)
-    plt.colorbar(im, ax=ax_corr, fraction=0.046, pad=0.04)
-    ax_corr.set_title('Correlation Heatmap')
-    st.pyplot(fig_corr)
-else:
-    st.info('Not enough numeric data for correlation heatmap.') 
-
-# NOTE: All Plotly charts are now extra small for compact laptop display: width=400, height=250 
\ No newline at end of file
+    fig = px.bar(exp_count, x='Experience Bucket', y='Count', color='Count', width=700, height=350, color_continuous_scale='Viridis')
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+def salary_by_experience_unit():
+    import plotly.express as px
+
+    fig = px.line(agg['salary_by_exp_unit'], x='PAST EXP', y='SALARY', color='UNIT', width=700, height=350,
+                  labels={'PAST EXP': 'Years of Experience', 'SALARY': 'Avg Salary'},
+                  title='Average Salary vs. Experience by Unit')
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+def pay_gap():
+    import plotly.express as px
+
+    paygap = agg['paygap']
+    fig = px.bar(paygap.reset_index(), x='UNIT', y=paygap.columns[:-1], barmode='group',
+                 width=700, height=350, title='Average Salary by Gender and Unit')
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10), yaxis_title='Avg Salary')
+    return fig
+
+
+def correlation_heatmap():
+    import matplotlib.pyplot as plt
+
+    corr = agg['corr']
+    fig, ax = plt.subplots(figsize=(6, 4))
+    im = ax.imshow(corr, cmap='coolwarm', interpolation='nearest')
+    ax.set_xticks(range(len(corr.columns)))
+    ax.set_yticks(range(len(corr.columns)))
+    ax.set_xticklabels(corr.columns, rotation=45, ha='right')
+    ax.set_yticklabels(corr.columns)
+    fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    ax.set_title('Correlation Heatmap')
+    return fig
+
+
+# --- Sections: only the open one is built and rendered ---
+
+def overview_section():
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🟠 Employee Count by Designation (Pie Chart)")
+        render_plotly('designation_pie', designation_pie)
+    with col2:
+        st.subheader("🔵 Employee Count by Unit (Pie Chart)")
+        render_plotly('unit_pie', unit_pie)
+
+    st.subheader("🟢 Salary Distribution (Histogram)")
+    render_pyplot('salary_histogram', salary_histogram)
+
+    st.subheader("🟡 Missing Values Overview")
+    missing = agg['missing']
+    if not missing.empty:
+        st.dataframe(missing.to_frame('Missing Count').style.background_gradient(cmap='Oranges'))
+    else:
+        st.success('No missing values found!')
+
+    st.subheader("🔴 Top 10 Highest Paid Employees")
+    st.dataframe(agg['top10'])
+
+
+def pay_section():
+    st.subheader("🟠 Animated Salary by Designation")
+    if agg.get('designation_salary_frames') or 'designation_salary_animation' in agg:
+        render_plotly('designation_salary_animation', designation_salary_animation)
+    else:
+        st.info('Designation data not available for the animated salary chart.')
+
+    st.subheader("🟤 Salary by Gender (Boxplot)")
+    render_pyplot('box_sex', lambda: salary_boxplot('box_sex', 'Salary by Gender', 'Gender', (5, 2.8), '#FFB300', '#6C47FF'))
+
+    st.subheader("🟣 Salary Distribution by Designation (Boxplot)")
+    render_pyplot('box_designation', lambda: salary_boxplot(
+        'box_designation', 'Salary by Designation', 'Designation', (6, 3.2), '#6C47FF', '#FFB300'))
+
+    st.subheader("🟢 Average Salary by Unit")
+    render_plotly('salary_by_unit', salary_by_unit)
+
+    st.subheader("🟣 Salary Distribution by Unit (Boxplot)")
+    if 'box_unit' in agg:
+        render_pyplot('box_unit', lambda: salary_boxplot('box_unit', 'Salary by Unit', 'Unit', (7, 3.5), '#43C59E', '#6C47FF'))
+    else:
+        st.info('Unit data not available for boxplot.')
+
+    st.subheader("🟤 Median Salary by Designation")
+    if 'median_salary_by_designation' in agg:
+        render_plotly('median_salary_by_designation', median_salary_by_designation)
+    else:
+        st.info('Designation data not available for median salary chart.')
+
+    st.subheader("🟠 Gender Pay Gap by Unit")
+    if 'paygap' in agg:
+        render_plotly('paygap', pay_gap)
+    else:
+        st.info('Unit or gender data not available for pay gap chart.')
+
+
+def experience_section():
+    st.subheader("🔴 Experience vs. Salary by Designation")
+    if 'exp_scatter' in agg:
+        render_plotly('exp_scatter', experience_scatter)
+    else:
+        st.info('Experience data not available for scatter plot.')
+
+    st.subheader("🟢 Average Salary by Experience Level")
+    if 'salary_by_exp_bucket' in agg:
+        render_plotly('salary_by_exp_bucket', salary_by_experience_bucket)
+    else:
+        st.info('Experience data not available for experience-level chart.')
+
+    st.subheader("🟢 Employee Count by Experience Bucket")
+    if 'count_by_exp_bucket' in agg:
+        render_plotly('count_by_exp_bucket', count_by_experience_bucket)
+    else:
+        st.info('Experience data not available for experience bucket chart.')
+
+    st.subheader("🔵 Salary vs. Experience (Line, by Unit)")
+    if 'salary_by_exp_unit' in agg:
+        render_plotly('salary_by_exp_unit', salary_by_experience_unit)
+    else:
+        st.info('Experience or unit data not available for salary vs. experience chart.')
+
+
+def workforce_section():
+    st.subheader("🟤 Gender Ratio by Unit (Stacked Bar)")
+    render_pyplot('gender_by_unit', gender_by_unit)
+
+    st.subheader("🟡 Correlation Heatmap")
+    if agg['corr'].shape[1] > 1:
+        render_pyplot('corr', correlation_heatmap)
+    else:
+        st.info('Not enough numeric data for correlation heatmap.')
+
+
+SECTIONS = {
+    'Overview': overview_section,
+    'Pay': pay_section,
+    'Experience': experience_section,
+    'Workforce': workforce_section,
+}
+
+# --- Opt-in timing of this rerun (SALARY_INSTRUMENT=1, SALARY_PROFILE=path.prof) ---
+rerun = instrumentation.begin_run('explore')
+try:
+    # --- Lottie Animation (cached on disk, never blocks on the network) ---
+    with instrumentation.stage('explore.lottie'):
+        lottie_json = load_lottie(LOTTIE_URL)
+    if lottie_json:
+        from streamlit_lottie import st_lottie
+
+        st_lottie(lottie_json, height=100, key="explore_anim")
+
+    # --- Load precomputed aggregates (recomputed only when the dataset changes) ---
+    with instrumentation.stage('explore.aggregates'):
+        agg = load_aggregates()
+
+    # --- Sidebar filters (resolved on precomputed row indexes) ---
+    st.sidebar.header("Filters")
+    filters = {}
+    for column, label in (('UNIT', 'Unit'), ('DESIGNATION', 'Designation'), ('SEX', 'Gender')):
+        if column in agg['categories']:
+            filters[column] = st.sidebar.multiselect(label, agg['categories'][column], placeholder='All')
+    for column, label, step in (('PAST EXP', 'Experience (years)', 1.0), ('RATINGS', 'Rating', 0.1)):
+        if column in agg['extents']:
+            low, high = agg['extents'][column]
+            if low < high:
+                filters[column] = st.sidebar.slider(label, min_value=low, max_value=high, value=(low, high), step=step)
+
+    # Charts are cached per dataset version and filter combination
+    chart_key = (dataset_version(dataset_path()), ())
+
+    # Only build the index once a filter narrows the data
+    if any(filters[c] for c in ('UNIT', 'DESIGNATION', 'SEX') if c in filters) or any(
+            filters[c] != agg['extents'][c] for c in ('PAST EXP', 'RATINGS') if c in filters):
+        with instrumentation.stage('explore.filter'):
+            filtered = load_index().aggregates(filters)
+        if filtered is not None:
+            total = agg['rows']
+            agg = filtered
+            chart_key = (chart_key[0], filter_key(filters))
+            st.sidebar.caption(f"Showing {agg['rows']:,} of {total:,} employees")
+            if not agg['rows']:
+                st.warning('No employees match the selected filters.')
+                st.stop()
+
+    # st.tabs would run every tab's charts on each rerun, so a tab-style
+    # selector picks the one section that is built and sent to the browser
+    section = st.radio('Section', list(SECTIONS), horizontal=True, label_visibility='collapsed', key='explore_section')
+    with instrumentation.stage(f'explore.section.{section.lower()}'):
+        SECTIONS[section]()
+
+    # --- Add extra padding at the bottom for laptop screens ---
+    st.markdown('<div style="height: 2em;"></div>', unsafe_allow_html=True)
+finally:
+    # Also when Streamlit interrupts the script to rerun or stop it
+    instrumentation.end_run(rerun)
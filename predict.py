@@ -0,0 +1,43 @@
+"""Batch salary prediction on whole DataFrames or CSV files."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_bundle
+from features import INPUT_COLUMNS, encode_features
+from instrumentation import count, stage
+from scorer import get_scorer
+
+
+def predict_batch(data, bundle=None):
+    """Predict salaries for every row of a DataFrame or CSV path.
+
+    ``data`` needs the dataset columns SEX, DESIGNATION, AGE, UNIT, RATINGS
+    and PAST EXP; other columns are ignored. Rows with a missing numeric
+    input get NaN instead of failing the whole batch. Unknown categories
+    raise ``ValueError`` from the encoders. Linear models are scored
+    through the folded ``scorer.LinearScorer`` instead of sklearn.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        data = pd.read_csv(data, usecols=INPUT_COLUMNS)
+    if bundle is None:
+        bundle = load_bundle()
+
+    count('predict.rows', len(data))
+    scorer = get_scorer(bundle)
+    if scorer is not None:
+        with stage('predict.score'):
+            return scorer.score_frame(data)
+
+    with stage('predict.encode'):
+        X = encode_features(data, bundle)
+    predictions = np.full(len(X), np.nan)
+    complete = ~np.isnan(X).any(axis=1)
+    if complete.any():
+        with stage('predict.scale'):
+            X_scaled = bundle['scaler'].transform(
+                pd.DataFrame(X[complete], columns=bundle['feature_order']))
+        with stage('predict.model'):
+            predictions[complete] = bundle['model'].predict(X_scaled)
+    return predictions
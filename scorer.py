@@ -0,0 +1,194 @@
+"""Fast scorer for the linear salary model that bypasses sklearn at predict time.
+
+The model is a linear regression on standardized features, most of them
+one-hot columns, so the scaler and encoders can be folded into the
+coefficients once:
+
+    salary = intercept
+             + SEX_WEIGHTS[sex] + DESIGNATION_WEIGHTS[designation] + UNIT_WEIGHTS[unit]
+             + w_age * age + w_ratings * ratings + w_exp * past_exp
+
+Scoring one row is then three dict lookups and a short dot product on
+plain Python floats, with no array allocation or input validation.
+
+The compiled scorer holds only plain Python values, so ``load_scorer``
+keeps a pickled copy under ``.cache`` next to the bundle's fingerprint
+and the scorer format version. A cold process then predicts without
+unpickling, or even importing, sklearn.
+"""
+import os
+import pickle
+import threading
+
+import numpy as np
+
+from artifacts import ARTIFACT_PATH, load_bundle
+from features import NUMERIC_COLUMNS, scaler_moments
+
+SCORER_PATH = os.path.join('.cache', 'scorer.pickle')
+# Bump when LinearScorer changes, so older pickled scorers are compiled again
+SCORER_VERSION = 1
+
+_cache = {}
+_lock = threading.Lock()
+_loaded = {}
+
+
+class LinearScorer:
+    """Per-category weight tables and a single intercept folded from a bundle."""
+
+    def __init__(self, bundle):
+        model = bundle['model']
+        scaler = bundle['scaler']
+        feature_order = bundle['feature_order']
+        n_features = len(feature_order)
+
+        mean, scale = scaler_moments(scaler, n_features)
+        weights = np.ravel(model.coef_) / scale
+        intercept = float(np.ravel(model.intercept_)[0]) - float(weights @ mean)
+        weight = dict(zip(feature_order, weights.tolist()))
+
+        # Label-encoded SEX contributes weight * code for each class
+        label_encoder_sex = bundle['label_encoder_sex']
+        self.sex_weights = {c: weight['SEX'] * i for i, c in enumerate(label_encoder_sex.classes_.tolist())}
+
+        # One-hot columns contribute their weight when set; dropped categories contribute 0
+        self.category_weights = {}
+        self.ignore_unknown = {}
+        for source, key in (('DESIGNATION', 'onehot_encoder_des'), ('UNIT', 'onehot_encoder_unit')):
+            encoder = bundle[key]
+            names = dict.fromkeys(encoder.categories_[0].tolist())
+            for category, name in zip(_active_categories(encoder), encoder.get_feature_names_out([source])):
+                names[category] = name
+            self.category_weights[source] = {c: weight[n] if n is not None else 0.0 for c, n in names.items()}
+            self.ignore_unknown[source] = encoder.handle_unknown != 'error'
+
+        self.numeric_weights = [weight[name] for name in NUMERIC_COLUMNS]
+        self.intercept = intercept
+
+    def score(self, sex, designation, age, unit, ratings, experience):
+        """Predict the salary of a single employee."""
+        try:
+            total = self.intercept + self.sex_weights[sex]
+        except KeyError:
+            raise ValueError(f'Unknown SEX {sex!r}') from None
+        total += self._lookup('DESIGNATION', designation) + self._lookup('UNIT', unit)
+        w_age, w_ratings, w_exp = self.numeric_weights
+        return total + w_age * age + w_ratings * ratings + w_exp * experience
+
+    def score_grid(self, sex, designation, age, unit, ratings, experience):
+        """Predict one employee's salary for every (experience, rating) pair.
+
+        Returns an array of shape ``(len(experience), len(ratings))``; the
+        model is linear, so the grid is one broadcast sum.
+        """
+        base = self.score(sex, designation, age, unit, 0.0, 0.0)
+        _, w_ratings, w_exp = self.numeric_weights
+        return (base + w_exp * np.asarray(experience, dtype=float)[:, None]
+                + w_ratings * np.asarray(ratings, dtype=float)[None, :])
+
+    def score_frame(self, data):
+        """Predict salaries for every row of a DataFrame of raw columns.
+
+        Missing numeric inputs propagate to NaN predictions; unknown
+        categories raise ``ValueError`` like the sklearn encoders do.
+        """
+        total = np.full(len(data), self.intercept)
+        total += self._lookup_column(data['SEX'], self.sex_weights, 'SEX', ignore_unknown=False)
+        for source in ('DESIGNATION', 'UNIT'):
+            total += self._lookup_column(data[source], self.category_weights[source], source,
+                                         self.ignore_unknown[source])
+        for name, w in zip(NUMERIC_COLUMNS, self.numeric_weights):
+            total += w * data[name].to_numpy(dtype=float)
+        return total
+
+    def _lookup(self, source, value):
+        table = self.category_weights[source]
+        if value in table:
+            return table[value]
+        if self.ignore_unknown[source]:
+            return 0.0
+        raise ValueError(f'Unknown {source} {value!r}')
+
+    @staticmethod
+    def _lookup_column(column, table, source, ignore_unknown):
+        import pandas as pd
+
+        categories = list(table)
+        codes = pd.Categorical(column, categories=categories).codes
+        unknown = codes < 0
+        if unknown.any() and not ignore_unknown:
+            values = pd.unique(np.asarray(column, dtype=object)[unknown])
+            raise ValueError(f'Unknown {source} values {list(values)!r}')
+        # The extra trailing 0.0 makes unknown codes (-1) contribute nothing
+        lookup = np.array([table[c] for c in categories] + [0.0])
+        return lookup[codes]
+
+
+def _active_categories(encoder):
+    """Categories of a fitted one-hot encoder that still have an output column."""
+    categories = encoder.categories_[0].tolist()
+    drop_idx = getattr(encoder, 'drop_idx_', None)
+    if drop_idx is not None and drop_idx[0] is not None:
+        del categories[int(drop_idx[0])]
+    return categories
+
+
+def compile_scorer(bundle):
+    """Fold a bundle into a ``LinearScorer``, or return None for non-linear models."""
+    if not hasattr(bundle['model'], 'coef_'):
+        return None
+    return LinearScorer(bundle)
+
+
+def get_scorer(bundle):
+    """Return the compiled scorer for a bundle, compiling it once per bundle."""
+    cached = _cache.get(id(bundle))
+    if cached is None or cached[0] is not bundle:
+        # Keep a reference to the bundle so its id cannot be reused
+        cached = (bundle, compile_scorer(bundle))
+        _cache.clear()
+        _cache[id(bundle)] = cached
+    return cached[1]
+
+
+def load_scorer(bundle_path=ARTIFACT_PATH, path=SCORER_PATH):
+    """Return the compiled scorer for the bundle at ``bundle_path``, or None for non-linear models.
+
+    The scorer is read from ``path`` while it matches the bundle's mtime
+    and size and ``SCORER_VERSION``; otherwise the bundle is loaded, compiled and the result
+    written back. Without a bundle file (legacy pickles) nothing is saved.
+    """
+    bundle_path = os.path.abspath(bundle_path)
+    if not os.path.exists(bundle_path):
+        return get_scorer(load_bundle(bundle_path))
+    stat = os.stat(bundle_path)
+    key = (bundle_path, stat.st_mtime_ns, stat.st_size, SCORER_VERSION)
+    if key in _loaded:
+        return _loaded[key]
+
+    with _lock:
+        if key in _loaded:
+            return _loaded[key]
+        scorer = None
+        try:
+            with open(path, 'rb') as file:
+                saved = pickle.load(file)
+            if saved['key'] == key:
+                scorer = saved['scorer']
+        except Exception:
+            # Missing, stale or unreadable copies are compiled again
+            saved = None
+        if scorer is None and (saved is None or saved['key'] != key):
+            scorer = get_scorer(load_bundle(bundle_path))
+            tmp_path = f'{path}.tmp'
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, 'wb') as file:
+                    pickle.dump({'key': key, 'scorer': scorer}, file)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+        _loaded.clear()
+        _loaded[key] = scorer
+        return scorer
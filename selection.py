@@ -0,0 +1,210 @@
+"""Cross-validated model selection on a process pool.
+
+The dataset is imputed, encoded and standardized once into a float64
+matrix that is saved as ``.npy`` files under ``.cache/selection``, keyed
+by a hash of the dataset version, the encoders, the scaler and the
+imputation settings. Rows are shuffled once when the matrix is written,
+so every fold's validation rows are one contiguous block, and the
+shuffled rows are stored twice in a row. The training rows of a fold,
+everything after its block and everything before it, are then also one
+contiguous slice: rows ``stop`` to ``start + n`` of the doubled matrix.
+
+Every (candidate, fold) pair is a separate task on a process pool. Workers
+open the cached files with ``mmap_mode='r'`` and fit on slices of them, so
+they share the operating system's page cache instead of each receiving or
+assembling a copy of the training rows; only copies an estimator makes
+itself (centering, binning) remain. Each worker runs single-threaded BLAS
+so the pool does not oversubscribe cores.
+"""
+import hashlib
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+
+from aggregates import dataset_version
+from dataset import dataset_path, read_dataset
+from features import INPUT_COLUMNS, encode_features
+from instrumentation import stage
+
+CACHE_DIR = os.path.join('.cache', 'selection')
+SELECTION_VERSION = 2
+# Rows encoded at a time while writing the cached matrix
+ENCODE_CHUNK = 500_000
+
+
+def default_candidates(seed=0):
+    """Candidate regressors by name: least squares, ridge and lasso over alpha grids, gradient boosting."""
+    candidates = {'linear': LinearRegression()}
+    for alpha in (0.1, 1.0, 10.0, 100.0):
+        candidates[f'ridge(alpha={alpha:g})'] = Ridge(alpha=alpha)
+    for alpha in (1.0, 10.0, 100.0, 1000.0):
+        candidates[f'lasso(alpha={alpha:g})'] = Lasso(alpha=alpha, max_iter=5000)
+    candidates['gradient_boosting'] = HistGradientBoostingRegressor(random_state=seed)
+    return candidates
+
+
+def _cache_key(path, bundle, settings):
+    digest = hashlib.sha1()
+    digest.update(f'{os.path.abspath(path)}:{dataset_version(path)}:{SELECTION_VERSION}:{settings}'.encode('utf-8'))
+    digest.update(pickle.dumps(list(bundle['feature_order'])))
+    scaler = bundle['scaler']
+    for attribute in ('mean_', 'scale_'):
+        digest.update(np.asarray(getattr(scaler, attribute, ()), dtype=float).tobytes())
+    for key in ('label_encoder_sex', 'onehot_encoder_des', 'onehot_encoder_unit'):
+        digest.update(pickle.dumps(bundle[key]))
+    return digest.hexdigest()[:16]
+
+
+def encoded_matrix(bundle, imputer, settings, seed=0, cache_dir=CACHE_DIR, path=None):
+    """Return the paths of the cached standardized matrix and target, building them once.
+
+    ``settings`` identifies the imputation (strategy, grouping and seed),
+    which is not recoverable from ``imputer`` itself. Rows with a missing
+    input or target after imputation are dropped. The rows are stored in a
+    seeded random order, twice over, so the files hold ``2 * n`` rows.
+    """
+    path = dataset_path() if path is None else path
+    key = _cache_key(path, bundle, settings)
+    X_path = os.path.join(cache_dir, f'{key}_X.npy')
+    y_path = os.path.join(cache_dir, f'{key}_y.npy')
+    if os.path.exists(X_path) and os.path.exists(y_path):
+        return X_path, y_path
+
+    columns = list(dict.fromkeys(INPUT_COLUMNS + ['SALARY'] + imputer.input_columns))
+    with stage('select.load'):
+        data = read_dataset(path, columns=columns)
+    with stage('select.impute'):
+        imputer.fit(data).transform(data)
+    data = data.dropna(subset=INPUT_COLUMNS + ['SALARY']).reset_index(drop=True)
+    order = np.random.default_rng(seed).permutation(len(data))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    n_features = len(bundle['feature_order'])
+    n_rows = len(data)
+    X = np.lib.format.open_memmap(f'{X_path}.tmp', mode='w+', dtype=np.float64, shape=(2 * n_rows, n_features))
+    y = np.tile(data['SALARY'].to_numpy(dtype=np.float64)[order], 2)
+    with stage('select.encode'):
+        for start in range(0, n_rows, ENCODE_CHUNK):
+            chunk = data.take(order[start:start + ENCODE_CHUNK])
+            encoded = pd.DataFrame(encode_features(chunk, bundle), columns=bundle['feature_order'])
+            scaled = bundle['scaler'].transform(encoded)
+            X[start:start + len(chunk)] = scaled
+            X[n_rows + start:n_rows + start + len(chunk)] = scaled
+    X.flush()
+    del X
+    # Publish the target first; the matrix appearing marks the cache complete
+    np.save(f'{y_path}.tmp.npy', y)
+    os.replace(f'{y_path}.tmp.npy', y_path)
+    os.replace(f'{X_path}.tmp', X_path)
+    return X_path, y_path
+
+
+def _rows(y):
+    """Number of distinct rows in the doubled cached arrays."""
+    return len(y) // 2
+
+
+def fold_bounds(n_rows, folds):
+    """``(start, stop)`` of each fold's validation block."""
+    edges = np.linspace(0, n_rows, folds + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+_arrays = {}
+_limits = None
+
+
+def _init_worker():
+    global _limits
+    from threadpoolctl import threadpool_limits
+
+    # One BLAS/OpenMP thread per process; the pool provides the parallelism
+    _limits = threadpool_limits(limits=1)
+
+
+def _open(path):
+    if path not in _arrays:
+        _arrays[path] = np.load(path, mmap_mode='r')
+    return _arrays[path]
+
+
+def _evaluate(task):
+    """Fit one candidate on all folds but one and score it on the held-out block."""
+    name, estimator, fold, (start, stop), X_path, y_path = task
+    X, y = _open(X_path), _open(y_path)
+    # The rows after the block followed by the rows before it, as a view of the memmap
+    n_rows = _rows(y)
+    X_train, y_train = X[stop:start + n_rows], y[stop:start + n_rows]
+
+    began = time.perf_counter()
+    model = clone(estimator).fit(X_train, y_train)
+    fitted = time.perf_counter()
+    predicted = model.predict(X[start:stop])
+    scored = time.perf_counter()
+
+    residual = np.asarray(y[start:stop]) - predicted
+    total = np.asarray(y[start:stop]) - np.mean(y[start:stop])
+    return {
+        'candidate': name,
+        'fold': fold,
+        'r2': 1.0 - float(residual @ residual) / float(total @ total),
+        'rmse': float(np.sqrt(np.mean(residual ** 2))),
+        'fit_s': fitted - began,
+        'predict_s': scored - fitted,
+    }
+
+
+def cross_validate(X_path, y_path, candidates, folds=5, jobs=None):
+    """Score every candidate with k-fold cross-validation on a process pool.
+
+    Returns the report dict: per-candidate mean and spread of R² and RMSE,
+    summed fit time, plus the wall time of the whole search.
+    """
+    n_rows = _rows(np.load(y_path, mmap_mode='r'))
+    if n_rows < folds:
+        raise ValueError(f'Need at least {folds} rows for {folds}-fold cross-validation, got {n_rows}')
+    jobs = jobs or os.cpu_count() or 1
+    tasks = [(name, estimator, fold, bounds, X_path, y_path)
+             for name, estimator in candidates.items()
+             for fold, bounds in enumerate(fold_bounds(n_rows, folds))]
+
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        # Slow candidates first, so the pool is not left waiting on one straggler
+        tasks.sort(key=lambda task: not isinstance(task[1], HistGradientBoostingRegressor))
+        results = list(pool.map(_evaluate, tasks))
+    wall = time.perf_counter() - began
+
+    report = {'rows': n_rows, 'folds': folds, 'jobs': jobs, 'wall_s': wall, 'candidates': {}}
+    for name in candidates:
+        scores = [r for r in results if r['candidate'] == name]
+        r2 = np.array([r['r2'] for r in scores])
+        rmse = np.array([r['rmse'] for r in scores])
+        report['candidates'][name] = {
+            'params': {k: v for k, v in candidates[name].get_params().items() if np.isscalar(v) or v is None},
+            'mean_r2': float(r2.mean()),
+            'std_r2': float(r2.std()),
+            'mean_rmse': float(rmse.mean()),
+            'std_rmse': float(rmse.std()),
+            'fit_s': float(sum(r['fit_s'] for r in scores)),
+            'predict_s': float(sum(r['predict_s'] for r in scores)),
+        }
+    busy = sum(c['fit_s'] + c['predict_s'] for c in report['candidates'].values())
+    # How many cores the search kept busy on average
+    report['parallel_efficiency'] = busy / (wall * jobs) if wall else 0.0
+    report['best'] = max(report['candidates'], key=lambda name: report['candidates'][name]['mean_r2'])
+    return report
+
+
+def refit(X_path, y_path, estimator):
+    """Fit ``estimator`` on every row of the cached matrix."""
+    X, y = np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r')
+    n_rows = _rows(y)
+    return clone(estimator).fit(X[:n_rows], y[:n_rows])
@@ -0,0 +1,323 @@
+"""Local HTTP prediction service with request micro-batching.
+
+Usage:
+    python serve.py [--host 127.0.0.1] [--port 8000] [--window-ms 2] [--max-batch 4096] [--offload-rows 1024]
+
+Endpoints:
+    POST /predict   one employee object, or a JSON list of them
+    GET  /health    liveness and model bundle info
+    GET  /metrics   request, batch, latency and throughput counters
+
+Employees use the form's fields: age, gender, unit, designation, ratings
+and experience. Requests that arrive within ``--window-ms`` of each other
+are scored together in one vectorized ``predict_batch`` call, on a worker
+thread once the batch is large enough to stall other connections. The
+server is plain asyncio, so it needs nothing beyond the app's requirements.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_bundle
+from predict import predict_batch
+
+# Request field -> dataset column
+FIELDS = {
+    'gender': 'SEX',
+    'designation': 'DESIGNATION',
+    'age': 'AGE',
+    'unit': 'UNIT',
+    'ratings': 'RATINGS',
+    'experience': 'PAST EXP',
+}
+NUMERIC_FIELDS = ('age', 'ratings', 'experience')
+CATEGORY_FIELDS = ('gender', 'designation', 'unit')
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LATENCY_WINDOW = 10_000
+# Batches with at least this many employees are scored off the event loop
+OFFLOAD_ROWS = 1024
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+
+class RequestError(Exception):
+    """A client error reported back as a 4xx response."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_employees(payload):
+    """Validate a request payload into a list of employee dicts and a 'batched' flag."""
+    batched = isinstance(payload, list)
+    employees = payload if batched else [payload]
+    if not employees:
+        raise RequestError('Expected at least one employee')
+    for i, employee in enumerate(employees):
+        if not isinstance(employee, dict):
+            raise RequestError(f'Employee {i} must be a JSON object')
+        missing = [field for field in FIELDS if field not in employee]
+        if missing:
+            raise RequestError(f'Employee {i} is missing {", ".join(missing)}')
+        for field in NUMERIC_FIELDS:
+            value = employee[field]
+            # json.loads accepts NaN and Infinity, which cannot be answered as valid JSON
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise RequestError(f'Employee {i} field {field!r} must be a finite number')
+        for field in CATEGORY_FIELDS:
+            if not isinstance(employee[field], str):
+                raise RequestError(f'Employee {i} field {field!r} must be a string')
+    return employees, batched
+
+
+def to_frame(employees):
+    """Build the raw-column DataFrame ``predict_batch`` expects."""
+    return pd.DataFrame({column: [e[field] for e in employees] for field, column in FIELDS.items()})
+
+
+class Metrics:
+    """Counters and a rolling latency window for the /metrics endpoint."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.predictions = 0
+        self.batches = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        latencies = np.array(self.latencies) * 1000.0
+        summary = {}
+        if len(latencies):
+            summary = {
+                'mean': float(latencies.mean()),
+                'p50': float(np.percentile(latencies, 50)),
+                'p99': float(np.percentile(latencies, 99)),
+                'max': float(latencies.max()),
+            }
+        return {
+            'uptime_seconds': uptime,
+            'requests_total': self.requests,
+            'errors_total': self.errors,
+            'predictions_total': self.predictions,
+            'batches_total': self.batches,
+            'mean_batch_size': self.predictions / self.batches if self.batches else 0.0,
+            'predictions_per_second': self.predictions / uptime if uptime else 0.0,
+            'latency_ms': summary,
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent prediction requests into one vectorized call.
+
+    Batches of at least ``offload_rows`` employees are scored on a worker
+    thread, so a large batch does not stall the event loop and every other
+    connection; smaller ones are cheaper to score in place.
+    """
+
+    def __init__(self, metrics, window=0.002, max_batch=4096, offload_rows=OFFLOAD_ROWS):
+        self.metrics = metrics
+        self.window = window
+        self.max_batch = max_batch
+        self.offload_rows = offload_rows
+        self.queue = asyncio.Queue()
+
+    async def predict(self, employees):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((employees, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            # Give concurrent requests one window to join the batch
+            await asyncio.sleep(self.window)
+            size = len(pending[0][0])
+            while size < self.max_batch and not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+                size += len(pending[-1][0])
+            # Requests whose client went away have already been cancelled
+            pending = [(batch, future) for batch, future in pending if not future.done()]
+            if not pending:
+                continue
+            batches = [batch for batch, _ in pending]
+            if sum(len(batch) for batch in batches) >= self.offload_rows:
+                outcomes, calls = await loop.run_in_executor(None, self._score, batches)
+            else:
+                outcomes, calls = self._score(batches)
+            self._resolve(pending, outcomes, calls)
+
+    def _score(self, batches):
+        """Score every batch; returns one ``(result, error)`` per batch and the number of calls made.
+
+        Runs on a worker thread for large batches, so it only computes and
+        leaves the futures to ``_resolve`` on the event loop.
+        """
+        try:
+            bundle = load_bundle()
+        except Exception as e:
+            # Keep the batcher alive; every waiting request reports the failure
+            return [(None, e)] * len(batches), 0
+        employees = [e for batch in batches for e in batch]
+        try:
+            predictions = predict_batch(to_frame(employees), bundle)
+        except Exception:
+            # One bad request must not fail the others, so score each on its own;
+            # nothing may escape, or the batcher task ends and later requests hang
+            outcomes = []
+            for batch in batches:
+                try:
+                    outcomes.append((predict_batch(to_frame(batch), bundle), None))
+                except ValueError as e:
+                    outcomes.append((None, RequestError(str(e))))
+                except Exception as e:
+                    outcomes.append((None, e))
+            return outcomes, 1 + len(batches)
+        outcomes = []
+        start = 0
+        for batch in batches:
+            outcomes.append((predictions[start:start + len(batch)], None))
+            start += len(batch)
+        return outcomes, 1
+
+    def _resolve(self, pending, outcomes, calls):
+        """Answer the waiting requests and count only the rows that were scored."""
+        self.metrics.batches += calls
+        for (batch, future), (result, error) in zip(pending, outcomes):
+            if error is None:
+                self.metrics.predictions += len(batch)
+            # The client may have gone away while a worker thread was scoring
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+class PredictionServer:
+    def __init__(self, window=0.002, max_batch=4096, offload_rows=OFFLOAD_ROWS):
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(self.metrics, window, max_batch, offload_rows)
+
+    async def handle(self, method, path, body):
+        """Route one request and return ``(status, payload)``."""
+        if path == '/health':
+            bundle = load_bundle()
+            return 200, {'status': 'ok', 'model': type(bundle['model']).__name__,
+                         'sklearn_version': bundle.get('sklearn_version')}
+        if path == '/metrics':
+            return 200, self.metrics.snapshot()
+        if path != '/predict':
+            raise RequestError(f'No route for {path}', 404)
+        if method != 'POST':
+            raise RequestError('Use POST for /predict', 405)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise RequestError('Body must be valid JSON') from None
+        employees, batched = parse_employees(payload)
+        predictions = [float(p) for p in await self.batcher.predict(employees)]
+        return 200, {'salaries': predictions} if batched else {'salary': predictions[0]}
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                started = time.perf_counter()
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, path, version = (request_line.split(' ') + ['', '', ''])[:3]
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                self.metrics.requests += 1
+                body = None
+                try:
+                    try:
+                        length = int(headers.get('content-length') or 0)
+                    except ValueError:
+                        raise RequestError('Invalid Content-Length') from None
+                    if length > MAX_BODY_BYTES:
+                        raise RequestError('Request body too large', 413)
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle(method, path.split('?', 1)[0], body)
+                except RequestError as e:
+                    self.metrics.errors += 1
+                    status, payload = e.status, {'error': str(e)}
+                except asyncio.IncompleteReadError:
+                    raise
+                except Exception as e:
+                    self.metrics.errors += 1
+                    status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+                self.metrics.latencies.append(time.perf_counter() - started)
+
+                # An unread body would be parsed as the next request, so close instead
+                keep_alive = (body is not None and version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        # Load the bundle before accepting requests so the first call is not slow
+        load_bundle()
+        batcher = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f'Serving predictions on http://{host}:{port}')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve salary predictions over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='interface to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--window-ms', type=float, default=2.0,
+                        help='how long to wait for concurrent requests to join a batch')
+    parser.add_argument('--max-batch', type=int, default=4096, help='most employees scored in one call')
+    parser.add_argument('--offload-rows', type=int, default=OFFLOAD_ROWS,
+                        help='score batches of at least this many employees on a worker thread')
+    args = parser.parse_args()
+
+    server = PredictionServer(window=args.window_ms / 1000.0, max_batch=args.max_batch,
+                              offload_rows=args.offload_rows)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Cold-start helpers: background artifact warm-up and an import-time report.
+
+``warm_up()`` loads the compiled scorer (see ``scorer.load_scorer``) on a
+daemon thread, so a fresh process renders the Home page while the
+artifacts are still loading; the page's own ``load_scorer()`` call then
+waits only for the part of the load that has not finished yet.
+
+Run as a script to see where a cold process spends its time before the
+first prediction:
+
+Usage:
+    python startup.py [--top 15] [--target 1.0] [--check]
+
+It prints the slowest top-level imports of the prediction path (from
+``python -X importtime``) and times two fresh interpreters from start to
+their first prediction: the first may compile the scorer, the second
+reads the cached copy as every later cold start does. ``--check`` exits
+non-zero when the second is above ``--target`` seconds.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from instrumentation import stage
+
+# Modules a cold Home page imports before its first prediction
+PREDICTION_MODULES = ['streamlit', 'streamlit_lottie', 'scorer', 'lottie_assets', 'startup']
+TARGET_SECONDS = 1.0
+
+_lock = threading.Lock()
+_thread = None
+
+# Runs in a fresh interpreter and reports when each step finished
+_COLD_START = '''
+import json, time
+start = time.perf_counter()
+import scorer
+imported = time.perf_counter()
+compiled = scorer.load_scorer()
+loaded = time.perf_counter()
+if compiled is not None:
+    compiled.score('F', 'Analyst', 30, 'IT', 3.0, 5)
+else:
+    import pandas as pd
+    from predict import predict_batch
+    predict_batch(pd.DataFrame([{'SEX': 'F', 'DESIGNATION': 'Analyst', 'AGE': 30, 'UNIT': 'IT',
+                                 'RATINGS': 3.0, 'PAST EXP': 5}]))
+predicted = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'load_s': loaded - imported, 'predict_s': predicted - loaded}))
+'''
+
+
+def _warm():
+    from scorer import load_scorer
+
+    try:
+        with stage('startup.warm_up'):
+            load_scorer()
+    except Exception:
+        # The page reports a missing or broken bundle when it loads it itself
+        pass
+
+
+def warm_up():
+    """Start loading the compiled scorer in the background, once per process."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm, name='artifact-warm-up', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def import_times(modules=PREDICTION_MODULES):
+    """Return ``(module, self_s, cumulative_s)`` for every top-level import of ``modules``.
+
+    Measured in a fresh interpreter with ``-X importtime``; sorted by
+    cumulative time, slowest first.
+    """
+    code = 'import ' + ', '.join(modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit() or name.startswith('  '):
+            # Header line, or a nested import already counted by its parent
+            continue
+        rows.append((name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def cold_start():
+    """Time a fresh interpreter from start to its first prediction.
+
+    Returns the seconds spent on interpreter start-up, imports, loading the
+    scorer and the prediction, plus their total.
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', _COLD_START], capture_output=True, text=True, check=True)
+    total = time.perf_counter() - start
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['interpreter_s'] = total - sum(timings.values())
+    timings['total_s'] = total
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report where a cold process spends its time.')
+    parser.add_argument('--top', type=int, default=15, help='number of imports to list')
+    parser.add_argument('--target', type=float, default=TARGET_SECONDS,
+                        help='seconds allowed from process start to the first prediction')
+    parser.add_argument('--check', action='store_true', help='exit non-zero when the target is missed')
+    args = parser.parse_args()
+
+    rows = import_times()
+    print(f'{"import":<40} {"self ms":>10} {"cumulative ms":>14}')
+    for name, own, cumulative in rows[:args.top]:
+        print(f'{name:<40} {own * 1000:10.1f} {cumulative * 1000:14.1f}')
+    print(f'{"total":<40} {"":>10} {sum(row[2] for row in rows) * 1000:14.1f}')
+
+    # The first start may compile the scorer; the second shows the usual start from its cached copy
+    first, cached = cold_start(), cold_start()
+    print(f'\n{"cold start":<12} {"first ms":>10} {"cached ms":>10}')
+    for key in ('interpreter_s', 'import_s', 'load_s', 'predict_s', 'total_s'):
+        print(f'{key[:-2]:<12} {first[key] * 1000:10.1f} {cached[key] * 1000:10.1f}')
+    met = cached['total_s'] <= args.target
+    print(f'First prediction {"within" if met else "above"} the {args.target:.2f} s target')
+    if args.check and not met:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
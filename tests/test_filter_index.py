@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import compute_aggregates
+from benchmarks.synthetic import generate
+from dataset import read_dataset
+from filter_index import FilterIndex
+
+FILTERS = [
+    {'UNIT': ['IT']},
+    {'PAST EXP': (2.0, 5.0)},
+    {'UNIT': ['IT', 'Web'], 'SEX': ['F'], 'RATINGS': (3.0, 4.0)},
+    {'DESIGNATION': ['Director'], 'UNIT': ['Finance']},
+]
+
+
+@pytest.fixture(scope='module')
+def data(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('filters') / 'synthetic.csv')
+    # Enough missing values that every column has some
+    data = read_dataset(generate(20_000, path, seed=3, missing_rate=0.01))
+    data.loc[::97, 'UNIT'] = np.nan
+    return data
+
+
+def subset(data, filters):
+    keep = np.ones(len(data), dtype=bool)
+    for column, selected in filters.items():
+        keep &= (data[column].isin(selected) if isinstance(selected, list) else data[column].between(*selected)).to_numpy()
+    return data[keep].reset_index(drop=True)
+
+
+def assert_same(actual, expected):
+    if isinstance(expected, pd.DataFrame):
+        assert [str(c) for c in actual.columns] == [str(c) for c in expected.columns]
+        for column in expected.columns:
+            assert_same(actual[column], expected[column])
+    elif isinstance(expected, pd.Series):
+        assert [str(v) for v in actual.index] == [str(v) for v in expected.index]
+        if pd.api.types.is_numeric_dtype(expected):
+            np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
+        else:
+            assert [str(v) for v in actual] == [str(v) for v in expected]
+    else:
+        np.testing.assert_allclose(actual, expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_cell_roll_up_matches_filtered_rows(data, filters):
+    actual = FilterIndex(data).aggregates(filters)
+    expected = compute_aggregates(subset(data, filters))
+
+    assert actual['rows'] == expected['rows']
+    for key in ('designation_count', 'unit_count', 'salary_by_unit', 'median_salary_by_designation',
+                'gender_by_unit', 'paygap', 'missing', 'corr', 'top10', 'salary_by_exp_bucket',
+                'count_by_exp_bucket', 'salary_by_exp_unit'):
+        assert_same(actual[key], expected[key])
+    assert list(actual['designation_salary_frames']) == list(expected['designation_salary_frames'])
+    for pair, frame in expected['designation_salary_frames'].items():
+        assert_same(actual['designation_salary_frames'][pair].reset_index(drop=True), frame.reset_index(drop=True))
+    for key in ('box_designation', 'box_unit', 'box_sex'):
+        assert [s['label'] for s in actual[key]] == [s['label'] for s in expected[key]]
+        for got, want in zip(actual[key], expected[key]):
+            for stat in ('q1', 'med', 'q3', 'whislo', 'whishi'):
+                assert got[stat] == pytest.approx(want[stat])
+            np.testing.assert_array_equal(np.sort(got['fliers']), np.sort(want['fliers']))
+    assert actual['salary_max'] == expected['salary_max']
+    assert actual['salary_histogram'][0].sum() == expected['salary_histogram'][0].sum()
+    assert len(actual['exp_scatter']) == len(expected['exp_scatter'])
+
+
+def test_no_matching_rows(data):
+    assert FilterIndex(data).aggregates({'DESIGNATION': ['Director'], 'PAST EXP': (0.0, 1.0)}) == {'rows': 0}
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+
+from artifacts import build_bundle
+from benchmarks.synthetic import generate_chunk
+from features import NUMERIC_COLUMNS, encode_features
+from imputation import make_imputer
+from linear_stats import LeastSquaresStats
+from predict import predict_batch
+from train_sklearn_model import train_incremental, train_streaming
+
+
+def assert_stats_equal(actual, expected):
+    assert actual.count == expected.count
+    np.testing.assert_allclose(actual.mean, expected.mean, rtol=1e-10, atol=1e-8)
+    np.testing.assert_allclose(actual.comoment, expected.comoment, rtol=1e-8, atol=1e-6)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_merge_matches_union(sparse):
+    rng = np.random.default_rng(0)
+    X = rng.normal(1000.0, 50.0, size=(500, 4))
+    y = X @ [3.0, -2.0, 0.5, 1.0] + rng.normal(size=500)
+    A, B = (sp.csr_matrix(X[:321]), sp.csr_matrix(X[321:])) if sparse else (X[:321], X[321:])
+
+    merged = LeastSquaresStats.from_chunk(A, y[:321]).merge(LeastSquaresStats.from_chunk(B, y[321:]))
+    assert_stats_equal(merged, LeastSquaresStats.from_chunk(X, y))
+
+    removed = LeastSquaresStats.from_chunk(X, y).remove(B, y[321:])
+    assert_stats_equal(removed, LeastSquaresStats.from_chunk(A, y[:321]))
+
+
+def make_bundle(data):
+    """A bundle with encoders and scaler fitted on ``data`` and an unfitted model."""
+    sex = LabelEncoder().fit(data['SEX'])
+    des = OneHotEncoder(handle_unknown='ignore').fit(data[['DESIGNATION']])
+    unit = OneHotEncoder(handle_unknown='ignore').fit(data[['UNIT']])
+    feature_order = (['SEX'] + NUMERIC_COLUMNS + list(des.get_feature_names_out(['DESIGNATION']))
+                     + list(unit.get_feature_names_out(['UNIT'])))
+    encoders = {'label_encoder_sex': sex, 'onehot_encoder_des': des, 'onehot_encoder_unit': unit,
+                'feature_order': feature_order}
+    scaler = StandardScaler().fit(pd.DataFrame(encode_features(data, encoders), columns=feature_order))
+    return build_bundle(LinearRegression(), sex, des, unit, scaler, feature_order)
+
+
+def with_model(bundle, model):
+    return build_bundle(model, bundle['label_encoder_sex'], bundle['onehot_encoder_des'],
+                        bundle['onehot_encoder_unit'], bundle['scaler'], bundle['feature_order'])
+
+
+def test_incremental_update_matches_full_training(tmp_path):
+    rng = np.random.default_rng(1)
+    # No missing values, so the random imputation cannot differ between the runs
+    base, changed, delta = (generate_chunk(rows, rng, missing_rate=0.0) for rows in (2000, 150, 636))
+    paths = {}
+    for name, data in (('base', base), ('changed', changed), ('delta', delta),
+                       ('history', pd.concat([base, changed])), ('combined', pd.concat([base, delta]))):
+        paths[name] = str(tmp_path / f'{name}.csv')
+        data.to_csv(paths[name], index=False)
+    missing_parquet = str(tmp_path / 'missing.parquet')
+    bundle = make_bundle(pd.concat([base, changed, delta]))
+
+    # Train on the history, then swap the changed rows for the delta
+    imputer = make_imputer()
+    model, stats = train_streaming(bundle, imputer, 500, paths['history'], missing_parquet)
+    state = {'stats': stats, 'imputer': imputer, 'feature_order': bundle['feature_order']}
+    updated, _, _ = train_incremental(with_model(bundle, model), state, paths['delta'], paths['changed'])
+
+    expected, _ = train_streaming(bundle, make_imputer(), 500, paths['combined'], missing_parquet)
+    np.testing.assert_allclose(updated.coef_, expected.coef_, rtol=1e-6, atol=1e-4)
+    np.testing.assert_allclose(updated.intercept_, expected.intercept_, rtol=1e-8)
+
+    inputs = pd.concat([base, delta])
+    np.testing.assert_allclose(predict_batch(inputs, with_model(bundle, updated)),
+                               predict_batch(inputs, with_model(bundle, expected)), rtol=1e-8)
+
+    # Streaming and incremental training share the statistics solver, so also
+    # compare against sklearn fitted from scratch on the standardized matrix
+    X = bundle['scaler'].transform(pd.DataFrame(encode_features(inputs, bundle), columns=bundle['feature_order']))
+    reference = LinearRegression().fit(X, inputs['SALARY'].to_numpy(dtype=float))
+    np.testing.assert_allclose(updated.coef_, reference.coef_, rtol=1e-6, atol=1e-4)
+    np.testing.assert_allclose(updated.intercept_, reference.intercept_, rtol=1e-8)
+    np.testing.assert_allclose(updated.predict(X), reference.predict(X), rtol=1e-8)
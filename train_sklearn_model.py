@@ -1,59 +1,208 @@
-import pandas as pd
-import pickle
+"""Train the salary model and save it into the model bundle.
+
+Usage:
+    python train_sklearn_model.py                        # fit on the whole dataset in memory
+    python train_sklearn_model.py --stream [--chunksize N]
+    python train_sklearn_model.py --impute median --impute-by DESIGNATION --seed 7
+    python train_sklearn_model.py --metrics train.prom --profile train.prof
+    python train_sklearn_model.py --update new_rows.csv [--remove old_rows.csv]
+    python train_sklearn_model.py --select [--folds 5] [--jobs N] [--report model_selection.json]
+
+``--stream`` reads the dataset in chunks and fits the model from
+accumulated least-squares statistics (see ``linear_stats.py``), so peak
+memory is bounded by the chunk size instead of the dataset size.
+Missing RATINGS and AGE are filled by the seeded imputation stage in
+``imputation.py``, so two runs on the same data give the same model.
+
+Every run also saves the least-squares statistics of the raw encoded
+features and the fitted imputer to ``salary_model.stats.joblib``.
+``--update`` folds a delta file into those statistics and re-solves, in
+time proportional to the delta; ``--remove`` takes out earlier versions
+of changed rows first. The result is the model a full training on the
+combined data would give, as long as the removed rows had no missing
+RATINGS or AGE (their random fills are not reproduced).
+
+``--select`` cross-validates least squares, ridge and lasso over alpha
+grids and gradient boosting in parallel (see ``selection.py``) and saves
+the best of them, refitted on all rows, with a timing and score report.
+"""
+import argparse
+import json
+import time
+
+import instrumentation
 from sklearn.linear_model import LinearRegression
 
-# Load data
-DATA_PATH = 'salary prediction.csv'
-data = pd.read_csv(DATA_PATH)
-
-# Drop irrelevant columns
-cols_to_drop = ['FIRST NAME','LAST NAME','DOJ', 'CURRENT DATE','LEAVES USED','LEAVES REMAINING']
-data = data.drop(cols_to_drop, axis=1)
-
-# Fill missing values for RATINGS and AGE
-import numpy as np
-choices = data['RATINGS'].dropna().unique()
-data['RATINGS'] = data['RATINGS'].apply(lambda x: float(np.random.choice(choices)) if pd.isnull(x) else x)
-choices_age = data['AGE'].dropna().unique()
-data['AGE'] = data['AGE'].apply(lambda x: float(np.random.choice(choices_age)) if pd.isnull(x) else x)
-
-# Load encoders and scaler
-with open('label_encoder_sex.pkl','rb') as file:
-    label_encoder_sex = pickle.load(file)
-with open('onehot_encoder_des.pkl','rb') as file:
-    onehot_encoder_des = pickle.load(file)
-with open('onehot_encoder_unit.pkl','rb') as file:
-    onehot_encoder_unit = pickle.load(file)
-with open('scaler.pkl','rb') as file:
-    scaler = pickle.load(file)
-with open('feature_order.pkl', 'rb') as f:
-    feature_order = pickle.load(f)
-
-# Encode features
-# SEX
-data['SEX'] = label_encoder_sex.transform(data['SEX'])
-# DESIGNATION
-dev_encoded = onehot_encoder_des.transform(data[['DESIGNATION']]).toarray()
-dev_encoded_df = pd.DataFrame(dev_encoded, columns=onehot_encoder_des.get_feature_names_out(['DESIGNATION']))
-# UNIT
-unit_encoded = onehot_encoder_unit.transform(data[['UNIT']]).toarray()
-unit_encoded_df = pd.DataFrame(unit_encoded, columns=onehot_encoder_unit.get_feature_names_out(['UNIT']))
-# Remove DESIGNATION and UNIT from the original DataFrame
-data = data.drop(['DESIGNATION', 'UNIT'], axis=1)
-# Combine all features
-data = pd.concat([data.reset_index(drop=True), dev_encoded_df, unit_encoded_df], axis=1)
-# Reorder columns
-X = data[feature_order]
-y = data['SALARY']
-# Scale features
-X_scaled = scaler.transform(X)
-
-# Train model
-model = LinearRegression()
-model.fit(X_scaled, y)
-
-# Save model
-with open('model.pkl', 'wb') as f:
-    pickle.dump(model, f)
-
-print('Trained and saved model.pkl') 
\ No newline at end of file
+from artifacts import ARTIFACT_PATH, STATS_PATH, build_bundle, load_bundle, load_stats, save_bundle, save_stats
+from dataset import CSV_PATH, PARQUET_PATH, iter_dataset, load_dataset, read_dataset
+from features import INPUT_COLUMNS, encode_features_sparse, scaler_moments
+from imputation import STRATEGIES, make_imputer
+from linear_stats import LeastSquaresStats
+from selection import cross_validate, default_candidates, encoded_matrix, refit
+
+
+def _training_columns(imputer):
+    """Model inputs, target and any grouping columns the imputer needs."""
+    return list(dict.fromkeys(INPUT_COLUMNS + ['SALARY'] + imputer.input_columns))
+
+
+def train_in_memory(bundle, imputer, csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    # Load only the model inputs and target from the typed dataset
+    with instrumentation.stage('train.load'):
+        data = load_dataset(columns=_training_columns(imputer), csv_path=csv_path, parquet_path=parquet_path)
+
+    # Fill missing values for RATINGS and AGE
+    with instrumentation.stage('train.impute'):
+        imputer.fit(data).transform(data)
+
+    # Encode features into one sparse matrix in feature order
+    with instrumentation.stage('train.encode'):
+        X = encode_features_sparse(data, bundle)
+        y = data['SALARY'].to_numpy(dtype=float)
+    # Solve exactly from the cross products, which are also kept for incremental updates
+    with instrumentation.stage('train.accumulate'):
+        stats = LeastSquaresStats.from_chunk(X, y)
+    return _solve(stats, bundle), stats
+
+
+def train_streaming(bundle, imputer, chunksize, csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """Fit the model chunk by chunk from accumulated least-squares statistics."""
+    source = {'csv_path': csv_path, 'parquet_path': parquet_path}
+    # A projected pass over the imputed columns fits the imputer
+    for chunk in iter_dataset(columns=imputer.input_columns, chunksize=chunksize, **source):
+        with instrumentation.stage('train.impute'):
+            imputer.update(chunk)
+
+    stats = LeastSquaresStats(len(bundle['feature_order']))
+    for chunk in iter_dataset(columns=_training_columns(imputer), chunksize=chunksize, **source):
+        instrumentation.count('train.chunks')
+        with instrumentation.stage('train.impute'):
+            imputer.transform(chunk)
+        with instrumentation.stage('train.encode'):
+            X = encode_features_sparse(chunk, bundle)
+        with instrumentation.stage('train.accumulate'):
+            stats.update(X, chunk['SALARY'].to_numpy(dtype=float))
+    return _solve(stats, bundle), stats
+
+
+def _solve(stats, bundle):
+    """Fit the model on the scaler's standardized features from raw statistics."""
+    with instrumentation.stage('train.fit'):
+        mean, scale = scaler_moments(bundle['scaler'], stats.n_features)
+        return stats.standardized(mean, scale).to_model()
+
+
+def _delta_stats(path, bundle, imputer, fit_imputer):
+    """Statistics of the rows in the dataset file ``path``."""
+    with instrumentation.stage('train.load'):
+        data = read_dataset(path, columns=_training_columns(imputer))
+    with instrumentation.stage('train.impute'):
+        if fit_imputer:
+            imputer.update(data)
+        imputer.transform(data)
+    with instrumentation.stage('train.encode'):
+        X = encode_features_sparse(data, bundle)
+    with instrumentation.stage('train.accumulate'):
+        return LeastSquaresStats.from_chunk(X, data['SALARY'].to_numpy(dtype=float))
+
+
+def train_incremental(bundle, state, delta_path=None, remove_path=None):
+    """Update saved training statistics with a delta file and re-solve the model.
+
+    ``state`` is what ``artifacts.load_stats`` returns. Rows in
+    ``remove_path`` are taken out before the rows in ``delta_path`` are
+    added, so a changed employee is passed once in each file.
+    """
+    if type(bundle['model']) is not LinearRegression:
+        raise ValueError(f'Incremental updates need a LinearRegression model, not {type(bundle["model"]).__name__}; '
+                         'retrain in full')
+    if state['feature_order'] != list(bundle['feature_order']):
+        raise ValueError('Saved training statistics do not match the bundle feature order; retrain in full')
+    stats, imputer = state['stats'], state['imputer']
+    if remove_path:
+        stats.subtract(_delta_stats(remove_path, bundle, imputer, fit_imputer=False))
+    if delta_path:
+        stats.merge(_delta_stats(delta_path, bundle, imputer, fit_imputer=True))
+    return _solve(stats, bundle), stats, imputer
+
+
+def select_model(bundle, args):
+    """Cross-validate the candidate regressors, write the report and return the refitted best."""
+    imputer = make_imputer(args.impute, by=args.impute_by, seed=args.seed)
+    settings = f'{args.impute}:{args.impute_by}:{args.seed}'
+    X_path, y_path = encoded_matrix(bundle, imputer, settings, seed=args.seed)
+    candidates = default_candidates(seed=args.seed)
+    with instrumentation.stage('train.select'):
+        report = cross_validate(X_path, y_path, candidates, folds=args.folds, jobs=args.jobs)
+    with instrumentation.stage('train.fit'):
+        start = time.perf_counter()
+        model = refit(X_path, y_path, candidates[report['best']])
+        report['refit_s'] = time.perf_counter() - start
+
+    with open(args.report, 'w') as file:
+        json.dump(report, file, indent=2)
+    for name, result in sorted(report['candidates'].items(), key=lambda item: -item[1]['mean_r2']):
+        print(f'{name:<24} R2 {result["mean_r2"]:.4f} ± {result["std_r2"]:.4f}  '
+              f'RMSE {result["mean_rmse"]:,.0f}  fit {result["fit_s"]:.2f} s')
+    print(f'Best: {report["best"]} ({report["wall_s"]:.1f} s on {report["jobs"]} workers, '
+          f'{report["parallel_efficiency"]:.0%} efficiency); report in {args.report}')
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the salary model and save the model bundle.')
+    parser.add_argument('--stream', action='store_true',
+                        help='read the dataset in chunks instead of loading it into memory')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk with --stream')
+    parser.add_argument('--impute', choices=STRATEGIES, default='random',
+                        help='how missing RATINGS and AGE are filled')
+    parser.add_argument('--impute-by', metavar='COLUMN',
+                        help='fill from the values observed within each group of COLUMN, e.g. DESIGNATION')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random imputation')
+    parser.add_argument('--update', metavar='DELTA',
+                        help=f'add the rows in DELTA to the statistics in {STATS_PATH} instead of retraining')
+    parser.add_argument('--remove', metavar='PATH',
+                        help='take the rows in PATH out of the saved statistics, e.g. old versions of changed rows')
+    parser.add_argument('--select', action='store_true',
+                        help='cross-validate several regressors in parallel and save the best one')
+    parser.add_argument('--folds', type=int, default=5, help='cross-validation folds with --select')
+    parser.add_argument('--jobs', type=int, help='worker processes with --select (default: all cores)')
+    parser.add_argument('--report', default='model_selection.json',
+                        help='JSON file for the per-candidate scores and timings of --select')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='time each stage and write the metrics to PATH (.prom for Prometheus text, else JSON)')
+    parser.add_argument('--profile', metavar='PATH', help='write a cProfile of the training run to PATH')
+    args = parser.parse_args()
+
+    if args.metrics:
+        instrumentation.enable()
+    run = instrumentation.begin_run('train', profile_path=args.profile)
+
+    # Load encoders and scaler
+    bundle = load_bundle()
+    stats = None
+    if args.select:
+        model = select_model(bundle, args)
+    elif args.update or args.remove:
+        model, stats, imputer = train_incremental(bundle, load_stats(), args.update, args.remove)
+    else:
+        imputer = make_imputer(args.impute, by=args.impute_by, seed=args.seed)
+        if args.stream:
+            model, stats = train_streaming(bundle, imputer, args.chunksize)
+        else:
+            model, stats = train_in_memory(bundle, imputer)
+
+    # Save model together with its encoders, scaler and feature order
+    with instrumentation.stage('train.save'):
+        save_bundle(build_bundle(model, bundle['label_encoder_sex'], bundle['onehot_encoder_des'],
+                                 bundle['onehot_encoder_unit'], bundle['scaler'], bundle['feature_order']))
+        if stats is not None:
+            save_stats(stats, imputer, bundle['feature_order'])
+    instrumentation.end_run(run, dump_path=args.metrics)
+
+    rows = f' on {stats.count} rows' if stats is not None else ''
+    print(f'Trained {type(model).__name__}{rows} and saved {ARTIFACT_PATH}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Salary over the whole experience x rating grid for one employee.
+
+The Home page's what-if panel shows how the predicted salary moves with
+years of experience (0-50) and performance rating (1.0-5.0 in 0.1 steps)
+while sex, designation, age and unit stay fixed. All 2,091 points are
+scored in one call: for the folded linear scorer that is one broadcast
+sum, for other models one ``predict_batch`` over the grid rows. Grids are
+cached per input combination and model.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation import count, stage
+
+EXPERIENCE_GRID = np.arange(0, 51, dtype=float)
+RATING_GRID = np.round(np.arange(10, 51) / 10, 1)
+CACHE_SIZE = 256
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def salary_grid(sex, designation, age, unit, scorer=None, bundle=None):
+    """Predicted salaries of shape ``(len(EXPERIENCE_GRID), len(RATING_GRID))``.
+
+    Pass the compiled ``scorer`` for linear models; otherwise ``bundle`` is
+    scored through ``predict.predict_batch``.
+    """
+    model = scorer if scorer is not None else bundle
+    # Keep the model itself in the entry so its id cannot be reused
+    key = (id(model), sex, designation, age, unit)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] is model:
+            _cache.move_to_end(key)
+            count('what_if.cache_hit')
+            return cached[1]
+
+    with stage('what_if.score'):
+        if scorer is not None:
+            grid = scorer.score_grid(sex, designation, age, unit, RATING_GRID, EXPERIENCE_GRID)
+        else:
+            import pandas as pd
+            from predict import predict_batch
+
+            experience, ratings = np.meshgrid(EXPERIENCE_GRID, RATING_GRID, indexing='ij')
+            rows = pd.DataFrame({
+                'SEX': sex, 'DESIGNATION': designation, 'AGE': age, 'UNIT': unit,
+                'RATINGS': ratings.ravel(), 'PAST EXP': experience.ravel(),
+            })
+            grid = predict_batch(rows, bundle).reshape(experience.shape)
+
+    with _lock:
+        _cache[key] = (model, grid)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return grid